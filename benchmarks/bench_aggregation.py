@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк бэкендов агрегации: стандартная библиотека против NumPy.
+
+Пример запуска (10 млн строк):
+  python benchmarks/bench_aggregation.py --rows 10000000
+
+По умолчанию замеряются два случая: 200 стран (мало групп, NumPy
+выигрывает) и 200 000 стран (почти все ключи блока различны, NumPy
+агрегирует построчно и не должен проигрывать стандартной библиотеке).
+
+Режим --stage full замеряет полный цикл (чтение CSV + агрегация),
+--stage aggregate - только агрегацию заранее прочитанных строк
+(строки держатся в памяти, поэтому для 10 млн строк нужно несколько ГБ).
+Бэкенды запускаются поочередно --repeat раз, в отчет идет лучшее время.
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from economic_reporter import vectorized  # noqa: E402
+from economic_reporter.processors import get_processor  # noqa: E402
+
+
+def generate_csv(path: str, rows: int, countries: int) -> None:
+    """Генерирует CSV файл со случайными экономическими данными"""
+    rng = random.Random(42)
+    continents = ['Asia', 'Europe', 'Africa', 'North America', 'South America', 'Oceania']
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['country', 'year', 'gdp', 'unemployment', 'population', 'continent'])
+        for i in range(rows):
+            country = i % countries
+            writer.writerow([
+                f'Country{country}',
+                2000 + i % 24,
+                f'{rng.uniform(100, 30000):.1f}',
+                f'{rng.uniform(1, 15):.1f}',
+                rng.randint(1, 1500),
+                continents[country % len(continents)],
+            ])
+
+
+def run(report: str, files: List[str], backend: str, rows: Optional[List[Dict[str, Any]]] = None) -> float:
+    """
+    Выполняет отчет выбранным бэкендом и возвращает время в секундах
+
+    Если переданы rows, замеряется только агрегация этих строк
+    """
+    processor = get_processor(report)
+    processor.backend = backend
+    started = time.perf_counter()
+    if rows is None:
+        processor.execute(files)
+    else:
+        processor.process(rows)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк бэкендов агрегации')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Количество строк')
+    parser.add_argument('--countries', type=int, nargs='+', default=[200, 200_000],
+                        help='Количество стран (несколько значений - несколько замеров)')
+    parser.add_argument('--report', default='average-gdp', help='Отчет для замера')
+    parser.add_argument('--stage', choices=['full', 'aggregate'], default='full', help='Что замерять')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество замеров каждого бэкенда')
+    args = parser.parse_args()
+
+    backends = ['python'] + (['numpy'] if vectorized.HAS_NUMPY else [])
+
+    for countries in args.countries:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'bench.csv')
+            print(f"Генерация {args.rows} строк, {countries} стран...")
+            generate_csv(path, args.rows, countries)
+
+            rows = None
+            if args.stage == 'aggregate':
+                rows = get_processor(args.report).reader.read_files([path])
+
+            timings = {backend: float('inf') for backend in backends}
+            for _ in range(args.repeat):
+                for backend in backends:
+                    timings[backend] = min(timings[backend], run(args.report, [path], backend, rows))
+            for backend in backends:
+                print(f"{backend:>8}: {timings[backend]:.2f} с ({args.rows / timings[backend]:,.0f} строк/с)")
+
+        if 'numpy' in timings:
+            print(f"Ускорение: x{timings['python'] / timings['numpy']:.2f}")
+        else:
+            print("NumPy не установлен, векторизованный бэкенд не замерялся")
+
+
+if __name__ == '__main__':
+    main()
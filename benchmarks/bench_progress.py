@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк накладных расходов отчета о прогрессе (--progress).
+
+Пример запуска:
+  python benchmarks/bench_progress.py --rows 2000000
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_aggregation import generate_csv  # noqa: E402
+from economic_reporter.processors import get_processor  # noqa: E402
+from economic_reporter.progress import ProgressReporter  # noqa: E402
+
+
+def run(report: str, files: List[str], progress: Optional[ProgressReporter]) -> float:
+    """Выполняет отчет и возвращает время в секундах"""
+    processor = get_processor(report, progress=progress)
+    started = time.perf_counter()
+    processor.execute(files)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк накладных расходов --progress')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Количество строк')
+    parser.add_argument('--report', default='average-gdp', help='Отчет для замера')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов (берется минимум)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'bench.csv')
+        print(f"Генерация {args.rows} строк...")
+        generate_csv(path, args.rows, countries=200)
+
+        # Замеры чередуются, чтобы фоновая нагрузка одинаково влияла на оба варианта
+        without_progress = with_progress = float('inf')
+        for _ in range(args.repeat):
+            without_progress = min(without_progress, run(args.report, [path], None))
+            # Сообщения пишутся в буфер, интервал короткий - худший для замера случай
+            reporter = ProgressReporter(stream=io.StringIO(), interval=0.1)
+            with_progress = min(with_progress, run(args.report, [path], reporter))
+
+    overhead = (with_progress / without_progress - 1) * 100
+    print(f"без --progress: {without_progress:.2f} с")
+    print(f" с --progress: {with_progress:.2f} с")
+    print(f"Накладные расходы: {overhead:+.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк времени запуска CLI.
+
+Замеряет `python -m economic_reporter.main --help` и простой отчет
+по небольшому файлу - типичные короткие запуски из cron.
+
+Пример запуска:
+  python benchmarks/bench_startup.py --repeat 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    '--help': ['--help'],
+    'trivial report': ['--files', os.path.join(PROJECT_DIR, 'data', 'economic1.csv'), '--report', 'average-gdp'],
+}
+
+
+def measure(args: List[str], repeat: int) -> List[float]:
+    """Запускает CLI repeat раз и возвращает времена в секундах"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, '-m', 'economic_reporter.main', *args],
+            cwd=PROJECT_DIR,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк времени запуска CLI')
+    parser.add_argument('--repeat', type=int, default=10, help='Количество запусков каждой команды')
+    args = parser.parse_args()
+
+    # Прогрев: индекс плагинов и байткод
+    measure(['--help'], 1)
+
+    for name, command in COMMANDS.items():
+        timings = measure(command, args.repeat)
+        print(f"{name:>15}: медиана {statistics.median(timings) * 1000:.0f} мс, "
+              f"минимум {min(timings) * 1000:.0f} мс")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+import heapq
+import pickle
+import sys
+import tempfile
+import zlib
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+
+# Приблизительный размер служебных структур одной группы в словаре агрегатов:
+# слот словаря, список [порядок, сумма, количество] и числа внутри него
+_ENTRY_OVERHEAD = 200
+
+# Максимальное количество записей в одном блоке файла секции
+_MERGE_CHUNK_SIZE = 1024
+
+# Запись файла секции: (порядок, ключ, сумма, количество)
+Record = Tuple[int, Hashable, float, int]
+
+
+class GroupAggregator:
+    """
+    Накопитель частичных агрегатов (сумма, количество) по ключам группировки
+
+    Значения группы складываются слева направо в порядке поступления, как
+    sum() по списку значений, поэтому результат совпадает с группировкой
+    всех записей в памяти.
+
+    Без лимита памяти все агрегаты хранятся в одном словаре. При заданном
+    лимите словарь растет до половины лимита (остальное - буферы секций и
+    запас оценки), после чего новые ключи в него не попадают: их значения
+    как есть дописываются во временные файлы, разбитые по хешу ключа на
+    секции. Значения ключа из словаря всегда складываются в памяти, а
+    значения остальных ключей лежат в файле своей секции в порядке
+    поступления, поэтому при слиянии секций порядок сложения не меняется.
+    Секции сливаются по одной; секция, различные ключи которой не помещаются
+    в лимит, рекурсивно делится дальше.
+    """
+
+    def __init__(self, memory_limit: Optional[int] = None, partitions: int = 16):
+        self.memory_limit = memory_limit
+        self.partitions = partitions
+        # Количество значений, сброшенных во временные файлы
+        self.spill_count = 0
+        self._groups: Dict[Hashable, List[Any]] = {}
+        self._memory_used = 0
+        self._next_order = 0
+        self._spill_files: Optional[List[Any]] = None
+        self._spill_buffers: List[List[Record]] = []
+        self._groups_limit: Optional[int] = None
+        # При слиянии секций в памяти находится по блоку на секцию, поэтому
+        # все блоки вместе занимают не больше четверти лимита
+        self._chunk_size = _MERGE_CHUNK_SIZE
+        if memory_limit is not None:
+            self._groups_limit = memory_limit // 2
+            self._chunk_size = max(1, min(_MERGE_CHUNK_SIZE, memory_limit // (4 * partitions * _ENTRY_OVERHEAD)))
+
+    def add(self, key: Hashable, value: Optional[float] = None) -> None:
+        """
+        Добавляет значение в группу
+
+        Args:
+            key: ключ группировки
+            value: числовое значение; None только регистрирует группу
+        """
+        entry = self._groups.get(key)
+        if entry is None:
+            entry = self._create_entry(key)
+            if entry is None:
+                self._spill_record(key, 0 if value is None else value, 0 if value is None else 1)
+                return
+        if value is not None:
+            entry[1] += value
+            entry[2] += 1
+
+    def add_partial(self, key: Hashable, total: float, count: int) -> None:
+        """
+        Добавляет уже посчитанный частичный агрегат группы
+
+        Args:
+            key: ключ группировки
+            total: сумма значений
+            count: количество значений
+        """
+        entry = self._groups.get(key)
+        if entry is None:
+            entry = self._create_entry(key)
+            if entry is None:
+                self._spill_record(key, total, count)
+                return
+        if count:
+            entry[1] += total
+            entry[2] += count
+
+    def entries(self, keys: List[Hashable]) -> List[Optional[List[Any]]]:
+        """
+        Возвращает записи групп [порядок, сумма, количество] для блока ключей
+
+        Нужен векторизованной агрегации: она сама обновляет сумму и
+        количество в записях. Новые группы создаются в порядке ключей.
+
+        Returns:
+            Записи, изменяемые на месте; None - группа не помещается в память,
+            и ее значения нужно добавлять через add
+        """
+        result = list(map(self._groups.get, keys))
+        if None in result:
+            for i, entry in enumerate(result):
+                if entry is None:
+                    result[i] = self._create_entry(keys[i])
+        return result
+
+    def items(self) -> Iterator[Tuple[Hashable, float, int]]:
+        """
+        Возвращает итоговые агрегаты в порядке первого появления ключей
+
+        Yields:
+            Кортежи (ключ, сумма, количество)
+        """
+        if self._spill_files is None:
+            for key, (_, total, count) in self._groups.items():
+                yield key, total, count
+            return
+
+        for buffer, spill_file in zip(self._spill_buffers, self._spill_files):
+            if buffer:
+                self._dump_chunk(buffer, spill_file)
+
+        # Группы из словаря тоже уходят на диск, чтобы слияние секций
+        # получило весь лимит; порядок вставки в словарь - порядок появления
+        groups_file = tempfile.TemporaryFile()
+        self._spill_files.append(groups_file)
+        self._rewrite(groups_file, (
+            (order, key, total, count) for key, (order, total, count) in self._groups.items()
+        ))
+        self._groups = {}
+        self._memory_used = 0
+
+        runs = [self._merge_partition(spill_file) for spill_file in self._spill_files[:-1]]
+        for _, key, total, count in heapq.merge(*(self._load(run) for run in [groups_file, *runs])):
+            yield key, total, count
+
+    def close(self) -> None:
+        """Удаляет временные файлы секций"""
+        for spill_file in self._spill_files or []:
+            spill_file.close()
+        self._spill_files = None
+
+    def _create_entry(self, key: Hashable) -> Optional[List[Any]]:
+        """
+        Создает запись новой группы
+
+        Returns:
+            Запись или None, если словарь групп уже занял свою часть лимита
+        """
+        if self._groups_limit is not None and self._memory_used > self._groups_limit:
+            return None
+
+        entry = [self._next_order, 0, 0]
+        self._next_order += 1
+        self._groups[key] = entry
+        if self._groups_limit is not None:
+            self._memory_used += sys.getsizeof(key) + _ENTRY_OVERHEAD
+        return entry
+
+    def _spill_record(self, key: Hashable, total: float, count: int) -> None:
+        """Дописывает значение группы, не поместившейся в память, в буфер ее секции"""
+        if self._spill_files is None:
+            self._spill_files = [tempfile.TemporaryFile() for _ in range(self.partitions)]
+            self._spill_buffers = [[] for _ in range(self.partitions)]
+
+        partition = self._partition(key)
+        buffer = self._spill_buffers[partition]
+        buffer.append((self._next_order, key, total, count))
+        self._next_order += 1
+        self.spill_count += 1
+        if len(buffer) >= self._chunk_size:
+            self._dump_chunk(buffer, self._spill_files[partition])
+
+    def _partition(self, key: Hashable, depth: int = 0) -> int:
+        """
+        Номер секции для ключа (стабильный хеш, не зависящий от PYTHONHASHSEED)
+
+        На каждом уровне повторного деления берутся следующие разряды хеша,
+        поэтому ключи одной секции расходятся по ее подсекциям.
+        """
+        key_hash = zlib.crc32(repr(key).encode('utf-8'))
+        return key_hash // self.partitions ** depth % self.partitions
+
+    def _write_partitions(self, records: Iterable[Record], files: List[Any], depth: int) -> None:
+        """Раскладывает записи по файлам секций небольшими блоками, сохраняя их порядок"""
+        buffers: List[List[Record]] = [[] for _ in files]
+        for record in records:
+            partition = self._partition(record[1], depth)
+            buffers[partition].append(record)
+            if len(buffers[partition]) >= self._chunk_size:
+                self._dump_chunk(buffers[partition], files[partition])
+        for buffer, partition_file in zip(buffers, files):
+            if buffer:
+                self._dump_chunk(buffer, partition_file)
+
+    def _merge_partition(self, spill_file: Any, depth: int = 1) -> Any:
+        """
+        Складывает значения групп одной секции в порядке их поступления
+
+        Если различные ключи секции не помещаются в лимит памяти, секция
+        делится на подсекции по следующим разрядам хеша, и они сливаются
+        рекурсивно, поэтому в памяти одновременно не больше memory_limit.
+
+        Returns:
+            Временный файл с агрегатами секции, упорядоченными по первому появлению ключа
+        """
+        merged: Optional[Dict[Hashable, List[Any]]] = {}
+        memory_used = 0
+        for order, key, total, count in self._load(spill_file):
+            entry = merged.get(key)
+            if entry is None:
+                if memory_used > self._groups_limit and self.partitions ** (depth + 1) <= 2 ** 32:
+                    merged = None
+                    break
+                entry = merged[key] = [order, 0, 0]
+                memory_used += sys.getsizeof(key) + _ENTRY_OVERHEAD
+            if count:
+                entry[1] += total
+                entry[2] += count
+
+        if merged is None:
+            return self._split_partition(spill_file, depth)
+
+        # Записи секции идут в порядке поступления, поэтому порядок вставки
+        # в merged уже совпадает с порядком первого появления ключей
+        self._rewrite(spill_file, (
+            (order, key, total, count) for key, (order, total, count) in merged.items()
+        ))
+        return spill_file
+
+    def _split_partition(self, spill_file: Any, depth: int) -> Any:
+        """Делит секцию на подсекции, сливает их и собирает результат обратно в файл секции"""
+        sub_files = [tempfile.TemporaryFile() for _ in range(self.partitions)]
+        try:
+            self._write_partitions(self._load(spill_file), sub_files, depth)
+            runs = [self._merge_partition(sub_file, depth + 1) for sub_file in sub_files]
+            self._rewrite(spill_file, heapq.merge(*(self._load(run) for run in runs)))
+        finally:
+            for sub_file in sub_files:
+                sub_file.close()
+        return spill_file
+
+    def _rewrite(self, spill_file: Any, records: Iterable[Record]) -> None:
+        """Заменяет содержимое файла записями, записанными небольшими блоками"""
+        spill_file.seek(0)
+        spill_file.truncate()
+        buffer: List[Record] = []
+        for record in records:
+            buffer.append(record)
+            if len(buffer) >= self._chunk_size:
+                self._dump_chunk(buffer, spill_file)
+        if buffer:
+            self._dump_chunk(buffer, spill_file)
+
+    @staticmethod
+    def _dump_chunk(buffer: List[Record], spill_file: Any) -> None:
+        """Дописывает блок записей в файл и очищает буфер"""
+        pickle.dump(buffer, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        buffer.clear()
+
+    @staticmethod
+    def _load(spill_file: Any) -> Iterator[Record]:
+        """Последовательно читает все блоки записей из временного файла"""
+        spill_file.seek(0)
+        while True:
+            try:
+                chunk = pickle.load(spill_file)
+            except EOFError:
+                return
+            yield from chunk
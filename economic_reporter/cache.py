@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Версия формата записей кеша; при изменении формата старые записи не используются
+CACHE_VERSION = 1
+
+# Размер блока при хешировании содержимого файлов
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Файл статистики: по байту на обращение к кешу
+STATS_FILE = 'stats.log'
+_STATS_MARKS = {'hits': b'h', 'misses': b'm'}
+
+# Размер файла статистики, после которого он сворачивается в итоговые счетчики
+STATS_LOG_LIMIT = 64 * 1024
+
+# Итоговые счетчики свернутой статистики и блокировка сворачивания;
+# блокировка старше STATS_LOCK_TIMEOUT секунд считается брошенной
+STATS_TOTALS_FILE = 'stats.totals'
+_STATS_ROTATED_FILE = STATS_FILE + '.old'
+_STATS_LOCK_FILE = 'stats.lock'
+STATS_LOCK_TIMEOUT = 60
+
+Sections = Dict[Optional[str], List[Tuple[str, float]]]
+
+
+class ResultCache:
+    """
+    Дисковый кеш готовых результатов отчетов
+
+    Ключ записи - параметры отчета и отпечатки входных файлов (путь, размер,
+    время изменения и, по желанию, хеш содержимого). При попадании файлы
+    не читаются вовсе. Записи старше ttl не используются, а при превышении
+    max_entries или max_bytes удаляются давно не использованные записи (LRU
+    по времени изменения файла записи, которое обновляется при попадании).
+    """
+
+    def __init__(self, directory: str, ttl: Optional[float] = None, max_entries: int = 1000,
+                 max_bytes: int = 64 * 1024 ** 2, hash_contents: bool = False):
+        """
+        Args:
+            directory: каталог для записей кеша
+            ttl: время жизни записи в секундах (None - без ограничения)
+            max_entries: максимальное количество записей
+            max_bytes: максимальный суммарный размер записей в байтах
+            hash_contents: учитывать в отпечатке хеш содержимого файлов
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hash_contents = hash_contents
+
+    def make_key(self, params: Dict[str, Any], file_paths: List[str]) -> Optional[str]:
+        """
+        Вычисляет ключ записи по параметрам отчета и отпечаткам файлов
+
+        Returns:
+            Ключ или None, если какой-то файл недоступен (тогда кеш не используется)
+        """
+        fingerprints = []
+        for file_path in file_paths:
+            try:
+                fingerprints.append(self._fingerprint(file_path))
+            except OSError:
+                return None
+
+        payload = json.dumps(
+            {'version': CACHE_VERSION, 'params': params, 'files': fingerprints},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Sections, Dict[str, Any]]]:
+        """
+        Возвращает сохраненный результат и обновляет статистику попаданий
+
+        Returns:
+            Кортеж (разделы отчета, дополнительные данные) или None при промахе
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+            expired = self.ttl is not None and time.time() - entry['created'] > self.ttl
+        except (OSError, ValueError, KeyError):
+            entry, expired = None, False
+
+        if entry is None or expired:
+            if expired:
+                self._remove(path)
+            self._record('misses')
+            return None
+
+        # Отмечаем запись как недавно использованную
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._record('hits')
+
+        sections = {
+            section: [(item_key, value) for item_key, value in results]
+            for section, results in entry['sections']
+        }
+        return sections, entry.get('extra', {})
+
+    def put(self, key: str, sections: Sections, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Сохраняет результат отчета и при необходимости вытесняет старые записи
+
+        Args:
+            key: ключ записи из make_key
+            sections: разделы отчета {раздел: [(ключ, значение)]}
+            extra: дополнительные данные для вывода при попадании
+        """
+        entry = {
+            'created': time.time(),
+            'sections': [[section, results] for section, results in sections.items()],
+            'extra': extra or {},
+        }
+        try:
+            self._write_json(self._entry_path(key), entry)
+        except OSError:
+            return  # Кеш не обязателен для работы
+        self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает накопленную статистику {'hits': N, 'misses': M}"""
+        totals = self._read_stats_totals()
+        for name in (_STATS_ROTATED_FILE, STATS_FILE):
+            marks = self._read_stats_marks(name)
+            for counter, mark in _STATS_MARKS.items():
+                totals[counter] += marks.count(mark)
+        return totals
+
+    def _fingerprint(self, file_path: str) -> List[Any]:
+        """Отпечаток файла: [путь, размер, время изменения, хеш содержимого или None]"""
+        stat = os.stat(file_path)
+        content_hash = None
+        if self.hash_contents:
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as file:
+                for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+                    digest.update(block)
+            content_hash = digest.hexdigest()
+        return [os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, content_hash]
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _record(self, counter: str) -> None:
+        """
+        Увеличивает счетчик попаданий или промахов
+
+        Счетчики не перезаписываются, а дописываются по байту в режиме O_APPEND:
+        такая запись атомарна, поэтому одновременные запуски не теряют обращения.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd = os.open(os.path.join(self.directory, STATS_FILE), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, _STATS_MARKS[counter])
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Удаляет просроченные записи и самые давние, если превышены лимиты"""
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # Время изменения записи не меньше времени ее создания
+            if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_bytes -= size
+
+        self._compact_stats()
+
+    def _compact_stats(self) -> None:
+        """
+        Сворачивает разросшийся файл статистики в итоговые счетчики
+
+        Файл статистики атомарно переименовывается, и новые обращения
+        дописываются уже в новый файл. Переименованный файл сворачивается в
+        итоги только при следующем сворачивании: процесс, открывший файл до
+        переименования, к этому времени давно дописал свой байт, поэтому
+        обращения не теряются. Одновременно сворачивает только один процесс.
+        """
+        try:
+            if os.path.getsize(os.path.join(self.directory, STATS_FILE)) < STATS_LOG_LIMIT:
+                return
+        except OSError:
+            return
+
+        lock_path = os.path.join(self.directory, _STATS_LOCK_FILE)
+        try:
+            os.close(os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock_path).st_mtime > STATS_LOCK_TIMEOUT:
+                    self._remove(lock_path)
+            except OSError:
+                pass
+            return
+        except OSError:
+            return
+
+        try:
+            totals = self._read_stats_totals()
+            marks = self._read_stats_marks(_STATS_ROTATED_FILE)
+            for counter, mark in _STATS_MARKS.items():
+                totals[counter] += marks.count(mark)
+            self._write_json(os.path.join(self.directory, STATS_TOTALS_FILE), totals)
+            rotated_path = os.path.join(self.directory, _STATS_ROTATED_FILE)
+            self._remove(rotated_path)
+            os.replace(os.path.join(self.directory, STATS_FILE), rotated_path)
+        except OSError:
+            pass
+        finally:
+            self._remove(lock_path)
+
+    def _read_stats_totals(self) -> Dict[str, int]:
+        """Читает итоговые счетчики свернутой статистики"""
+        try:
+            with open(os.path.join(self.directory, STATS_TOTALS_FILE), 'r', encoding='utf-8') as file:
+                totals = json.load(file)
+            return {counter: int(totals.get(counter, 0)) for counter in _STATS_MARKS}
+        except (OSError, ValueError, AttributeError):
+            return dict.fromkeys(_STATS_MARKS, 0)
+
+    def _read_stats_marks(self, name: str) -> bytes:
+        """Читает байты обращений из файла статистики"""
+        try:
+            with open(os.path.join(self.directory, name), 'rb') as file:
+                return file.read()
+        except OSError:
+            return b''
+
+    def _write_json(self, path: str, data: Any) -> None:
+        """Атомарно записывает JSON: через временный файл и os.replace"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        """Удаляет файл, игнорируя ошибки (например, если его уже удалил другой процесс)"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
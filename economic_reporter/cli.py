@@ -1,6 +1,43 @@
 import argparse
 from typing import List
 
+from .registry import available_reports, ROLLUP_LEVELS, DEFAULT_ROLLUP_LEVELS
+
+# Множители суффиксов для размеров в байтах
+SIZE_UNITS = {
+    '': 1,
+    'K': 1024,
+    'M': 1024 ** 2,
+    'G': 1024 ** 3,
+}
+
+
+def parse_size(value: str) -> int:
+    """
+    Преобразует размер вида 512K, 256M, 2G или число байт в количество байт
+
+    Args:
+        value: строка с размером
+
+    Returns:
+        Размер в байтах
+
+    Raises:
+        argparse.ArgumentTypeError: если размер некорректен
+    """
+    size_str = value.strip().upper()
+    if size_str.endswith('B'):
+        size_str = size_str[:-1]
+    unit = size_str[-1:] if size_str[-1:] in SIZE_UNITS else ''
+    number_str = size_str[:-1] if unit else size_str
+    try:
+        size = int(float(number_str) * SIZE_UNITS[unit])
+    except (ValueError, OverflowError):
+        raise argparse.ArgumentTypeError(f"Некорректный размер: {value}")
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"Размер должен быть положительным: {value}")
+    return size
+
 
 def parse_args(args: List[str] = None):
     """
@@ -12,19 +49,38 @@ def parse_args(args: List[str] = None):
     Returns:
         Namespace с аргументами
     """
+    reports = available_reports()
+    name_width = max(len(name) for name in reports)
+    reports_help = '\n'.join(
+        f"  {name:<{name_width}} - {description}" for name, description in reports.items()
+    )
+
     parser = argparse.ArgumentParser(
         description='Генератор отчетов по макроэкономическим данным',
         formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+        epilog=f"""
 Примеры использования:
   python main.py --files data1.csv data2.csv --report average-gdp
   python main.py --files dataset.csv --report average-unemployment
   python main.py --files *.csv --report population-by-continent
+  python main.py --files *.csv --report average-gdp --memory-limit 256M
+  python main.py --files *.csv --report gdp-rollup --group-by continent continent-year
+  python main.py --files big/*.csv --report average-gdp --progress
+  python main.py --files economic1.csv economic2.csv --report average-gdp --dedupe last --prefer economic2.csv
+  python main.py --files *.csv --report average-gdp --cache --cache-stats
+  python main.py --files /mnt/nfs/*.csv --report average-gdp --prefetch 4 --prefetch-memory 256M
 
 Доступные отчеты:
-  average-gdp             - Средний ВВП по странам
-  average-unemployment    - Средняя безработица по странам
-  population-by-continent - Население по континентам
+{reports_help}
+
+Уровни для rollup-отчетов: {', '.join(ROLLUP_LEVELS)}
+
+Дополнительные отчеты подключаются через entry points группы
+economic_reporter.processors или каталоги из ECONOMIC_REPORTER_PLUGIN_PATH.
+
+Кеш результатов включается флагом --cache или переменной окружения
+ECONOMIC_REPORTER_RESULT_CACHE=1 и хранится в каталоге кеша
+(ECONOMIC_REPORTER_CACHE_DIR, по умолчанию ~/.cache/economic_reporter).
         """
     )
 
@@ -38,8 +94,7 @@ def parse_args(args: List[str] = None):
     parser.add_argument(
         '--report',
         required=True,
-        choices=['average-gdp', 'average-unemployment', 'population-by-continent'
-                                                        ''],
+        choices=list(reports),
         help='Тип отчета для генерации'
     )
 
@@ -57,4 +112,104 @@ def parse_args(args: List[str] = None):
         help='Ограничить количество выводимых записей'
     )
 
+    parser.add_argument(
+        '--memory-limit',
+        type=parse_size,
+        default=None,
+        help='Лимит памяти на группировку (например, 512M или 2G); '
+             'при превышении агрегаты сбрасываются во временные файлы'
+    )
+
+    parser.add_argument(
+        '--group-by',
+        nargs='+',
+        choices=list(ROLLUP_LEVELS),
+        default=None,
+        help='Уровни группировки для rollup-отчетов '
+             f"(по умолчанию: {' '.join(DEFAULT_ROLLUP_LEVELS)})"
+    )
+
+    parser.add_argument(
+        '--dedupe',
+        choices=['first', 'last'],
+        default=None,
+        help='Удалять дубликаты записей по (country, year), оставляя первую или последнюю'
+    )
+
+    parser.add_argument(
+        '--prefer',
+        nargs='+',
+        default=None,
+        metavar='FILE',
+        help='Файлы, записи которых имеют приоритет при удалении дубликатов '
+             '(в порядке убывания приоритета)'
+    )
+
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Читать заранее в фоновых потоках до N файлов, пока разбирается текущий '
+             '(по умолчанию: 0 - без упреждающего чтения)'
+    )
+
+    parser.add_argument(
+        '--prefetch-memory',
+        type=parse_size,
+        default=64 * 1024 ** 2,
+        help='Лимит памяти на буферы упреждающего чтения (по умолчанию: 64M)'
+    )
+
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help='Выводить в stderr прогресс: байты, строки, скорость и оставшееся время'
+    )
+
+    parser.add_argument(
+        '--progress-interval',
+        type=float,
+        default=1.0,
+        help='Интервал между сообщениями о прогрессе в секундах (по умолчанию: 1)'
+    )
+
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Использовать дисковый кеш результатов отчетов'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать кеш результатов, даже если он включен в окружении'
+    )
+
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=24 * 60 * 60,
+        help='Время жизни записи кеша в секундах (по умолчанию: 86400)'
+    )
+
+    parser.add_argument(
+        '--cache-max-size',
+        type=parse_size,
+        default=64 * 1024 ** 2,
+        help='Максимальный размер кеша (по умолчанию: 64M)'
+    )
+
+    parser.add_argument(
+        '--cache-hash',
+        action='store_true',
+        help='Учитывать в ключе кеша хеш содержимого файлов, а не только размер и время изменения'
+    )
+
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help='Выводить в stderr статистику попаданий и промахов кеша'
+    )
+
     return parser.parse_args(args)
@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 
 
 class TableFormatter:
@@ -63,13 +63,14 @@ class TableFormatter:
         return f"| {index:>{max_index_len}} | {country:<{max_country_len}} | {value:>10.2f} |"
 
     @staticmethod
-    def format_report(report_name: str, data: List[Tuple[str, float]]) -> str:
+    def format_report(report_name: str, data: List[Tuple[str, float]], section: Optional[str] = None) -> str:
         """
         Формирует полный отчет с заголовком
 
         Args:
             report_name: название отчета
             data: данные для отображения
+            section: название раздела отчета (например, уровень rollup-отчета)
 
         Returns:
             Полный отчет в виде строки
@@ -79,13 +80,18 @@ class TableFormatter:
             'average-gdp': 'gdp',
             'average-unemployment': 'unemployment',
             'population-by-continent': 'population',
+            'gdp-rollup': 'gdp',
+            'unemployment-rollup': 'unemployment',
+            'population-rollup': 'population',
         }
 
         value_header = headers_map.get(report_name, 'value')
 
+        title = f"{report_name} ({section})" if section else report_name
+
         # Формируем отчет
         report_lines = [
-            f"\nОтчет: {report_name}",
+            f"\nОтчет: {title}",
             TableFormatter.format_table(data, ('country', value_header))
         ]
 
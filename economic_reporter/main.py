@@ -4,12 +4,22 @@
 Использует только стандартную библиотеку Python.
 """
 
+import heapq
+import os
 import sys
-from typing import List, Tuple
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from .cli import parse_args
-from .processors import get_processor
+from .registry import get_processor, get_processor_class, default_cache_dir
 from .formatter import TableFormatter
+from .progress import ProgressReporter
+
+
+# Переменная окружения, включающая кеш результатов (например, для запусков из cron)
+RESULT_CACHE_ENV = 'ECONOMIC_REPORTER_RESULT_CACHE'
+
+Sections = Dict[Optional[str], List[Tuple[str, float]]]
 
 
 def sort_data(data: List[Tuple[str, float]], reverse: bool = True) -> List[Tuple[str, float]]:
@@ -17,34 +27,174 @@ def sort_data(data: List[Tuple[str, float]], reverse: bool = True) -> List[Tuple
     return sorted(data, key=lambda x: x[1], reverse=reverse)
 
 
+def select_data(data: Iterable[Tuple[str, float]], reverse: bool = True,
+                limit: Optional[int] = None) -> List[Tuple[str, float]]:
+    """
+    Сортирует данные по значению и оставляет первые limit записей
+
+    С лимитом данные не сортируются целиком: heapq.nlargest/nsmallest держат
+    в памяти только limit записей, поэтому результат отчета можно перебирать
+    потоком. Порядок равных значений тот же, что у sort_data.
+    """
+    if limit and limit > 0:
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        return select(limit, data, key=itemgetter(1))
+    return sort_data(list(data), reverse)
+
+
+def run_report(args, progress: Optional[ProgressReporter]) -> Tuple[Sections, Dict[str, Any]]:
+    """
+    Читает файлы, выполняет отчет, сортирует и обрезает результаты
+
+    Returns:
+        Кортеж (разделы отчета, дополнительные данные для вывода)
+    """
+    if args.prefer and not args.dedupe:
+        raise ValueError("Параметр --prefer используется только вместе с --dedupe")
+
+    # Получаем процессор для отчета
+    processor = get_processor(
+        args.report,
+        memory_limit=args.memory_limit,
+        progress=progress,
+        dedupe=args.dedupe,
+        prefer=args.prefer,
+        prefetch_depth=args.prefetch,
+        prefetch_memory=args.prefetch_memory,
+    )
+
+    if args.group_by:
+        # Импорт здесь, чтобы не загружать модуль процессоров при каждом запуске
+        from .processors import RollupProcessor
+        if not isinstance(processor, RollupProcessor):
+            raise ValueError(f"Параметр --group-by не поддерживается отчетом {args.report}")
+        processor.levels = args.group_by
+
+    # Выполняем обработку: разделы отдаются потоком, поэтому с --limit
+    # полный результат не хранится в памяти
+    reverse_sort = args.sort == 'desc'
+    sections = {
+        section: select_data(results, reverse_sort, args.limit)
+        for section, results in processor.iter_sections(processor.reader.iter_rows(args.files)).items()
+    }
+
+    if progress is not None:
+        progress.finish()
+
+    extra = {}
+    if args.dedupe:
+        extra['duplicates_dropped'] = processor.reader.duplicates_dropped
+
+    return sections, extra
+
+
+def open_cache(args):
+    """Создает кеш результатов, если он включен флагом --cache или окружением"""
+    enabled = args.cache or os.environ.get(RESULT_CACHE_ENV) == '1'
+    if not enabled or args.no_cache:
+        return None
+
+    from .cache import ResultCache
+    return ResultCache(
+        os.path.join(default_cache_dir(), 'results'),
+        ttl=args.cache_ttl,
+        max_bytes=args.cache_max_size,
+        hash_contents=args.cache_hash,
+    )
+
+
+def cache_params(args) -> Dict[str, Any]:
+    """
+    Параметры запуска, от которых зависит результат отчета, для ключа кеша
+
+    Кроме аргументов командной строки учитываются бэкенд агрегации
+    процессора и время изменения всех модулей пакета и модулей классов
+    процессора: после обновления пакета или правки процессора (в том числе
+    плагина) старые записи не используются.
+    """
+    processor_class = get_processor_class(args.report)
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    module_files = [
+        os.path.join(package_dir, name) for name in sorted(os.listdir(package_dir)) if name.endswith('.py')
+    ]
+    for cls in processor_class.__mro__:
+        module_file = getattr(sys.modules.get(cls.__module__), '__file__', None)
+        if module_file:
+            module_files.append(os.path.abspath(module_file))
+
+    modules: Dict[str, Optional[int]] = {}
+    for module_file in module_files:
+        if module_file not in modules:
+            try:
+                modules[module_file] = os.stat(module_file).st_mtime_ns
+            except OSError:
+                modules[module_file] = None
+
+    return {
+        'report': args.report,
+        'sort': args.sort,
+        'limit': args.limit,
+        'group_by': args.group_by,
+        'dedupe': args.dedupe,
+        'prefer': [os.path.abspath(path) for path in args.prefer or []],
+        'backend': processor_class.backend,
+        'memory_limit': args.memory_limit,
+        'modules': modules,
+    }
+
+
 def main():
     """Основная функция приложения"""
+    progress = None
     try:
         # Парсим аргументы
         args = parse_args()
 
-        # Получаем процессор для отчета
-        processor = get_processor(args.report)
+        if args.progress:
+            progress = ProgressReporter(interval=args.progress_interval)
+
+        # Ключ кеша включает все параметры, влияющие на результат
+        cache = open_cache(args)
+        cache_key = None
+        cached = None
+        if cache is not None:
+            cache_key = cache.make_key(cache_params(args), args.files)
+            if cache_key is not None:
+                cached = cache.get(cache_key)
 
-        # Выполняем обработку
         print(f"Обработка {len(args.files)} файлов...")
-        results = processor.execute(args.files)
+        if cached is not None:
+            sections, extra = cached
+        else:
+            sections, extra = run_report(args, progress)
+
+        if args.cache_stats and cache is not None:
+            stats = cache.stats()
+            status = 'попадание' if cached is not None else 'промах'
+            print(f"Кеш: {status} (всего попаданий: {stats['hits']}, промахов: {stats['misses']})",
+                  file=sys.stderr)
 
-        if not results:
+        if 'duplicates_dropped' in extra:
+            print(f"Удалено дубликатов (country, year): {extra['duplicates_dropped']}")
+
+        if not any(sections.values()):
             print("Нет данных для отображения. Проверьте входные файлы.")
             sys.exit(1)
 
-        # Сортируем результаты
-        reverse_sort = args.sort == 'desc'
-        sorted_results = sort_data(results, reverse_sort)
-
-        # Применяем лимит, если указан
-        if args.limit and args.limit > 0:
-            sorted_results = sorted_results[:args.limit]
+        if cached is None and cache_key is not None:
+            cache.put(cache_key, sections, extra)
 
         # Форматируем и выводим отчет
-        report = TableFormatter.format_report(args.report, sorted_results)
-        print(report)
+        for section, results in sections.items():
+            report = TableFormatter.format_report(args.report, results, section)
+            print(report)
+
+    except KeyboardInterrupt:
+        message = "\nПрервано пользователем"
+        if progress is not None:
+            message += f": {progress.summary()}"
+        print(message, file=sys.stderr)
+        sys.exit(130)
 
     except Exception as e:
         print(f"Ошибка: {e}", file=sys.stderr)
@@ -1,13 +1,43 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Tuple
+from itertools import chain, islice
+from operator import itemgetter
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator, Hashable
 from .reader import CSVReader
+from .aggregator import GroupAggregator
+from . import vectorized
+from .registry import ROLLUP_LEVELS, DEFAULT_ROLLUP_LEVELS
+from .registry import get_processor  # noqa: F401 - совместимость со старым импортом
 
 
 class ReportProcessor(ABC):
-    """Абстрактный базовый класс для обработчиков отчетов"""
+    """
+    Абстрактный базовый класс для обработчиков отчетов
+
+    Наследнику достаточно задать required_columns, group_column и
+    value_column: записи агрегируются потоком в (сумма, количество) по
+    группам, а итоговое значение группы считает finalize (по умолчанию
+    среднее). Процессор может и целиком переопределить process, как до
+    появления потоковой агрегации: тогда он получает список всех записей.
+    """
 
-    def __init__(self):
-        self.reader = CSVReader(self.required_columns)
+    # Колонка, по которой группируются записи
+    group_column: str = ''
+    # Числовая колонка, значения которой агрегируются
+    value_column: str = ''
+    # Разделитель разрядов, удаляемый перед преобразованием в число (None - не удалять)
+    thousands_separator: Optional[str] = ','
+    # Бэкенд агрегации: 'numpy' (если установлен NumPy) или 'python'
+    backend: str = vectorized.DEFAULT_BACKEND
+
+    def __init__(self, memory_limit: Optional[int] = None, **reader_options: Any):
+        """
+        Args:
+            memory_limit: лимит памяти на этап группировки в байтах
+                (None - без ограничения, агрегаты не сбрасываются на диск)
+            **reader_options: параметры CSVReader (progress, dedupe, prefer, prefetch_depth, prefetch_memory)
+        """
+        self.reader = CSVReader(self.required_columns, **reader_options)
+        self.memory_limit = memory_limit
 
     @property
     @abstractmethod
@@ -15,8 +45,151 @@ class ReportProcessor(ABC):
         """Возвращает список необходимых колонок для отчета"""
         pass
 
-    @abstractmethod
-    def process(self, data: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    def finalize(self, total: float, count: int) -> Optional[float]:
+        """
+        Вычисляет итоговое значение группы по частичному агрегату (по умолчанию среднее)
+
+        Args:
+            total: сумма корректных значений группы
+            count: количество корректных значений группы
+
+        Returns:
+            Значение для отчета или None, если группу нужно пропустить
+        """
+        return total / count if count else None
+
+    def group_key(self, record: Dict[str, Any]) -> Optional[Hashable]:
+        """Возвращает ключ группировки записи или None, если запись не группируется"""
+        return record.get(self.group_column)
+
+    def chunk_keys(self, chunk: List[Dict[str, Any]]) -> List[Optional[Hashable]]:
+        """
+        Возвращает ключи группировки блока записей (аналог group_key для блока)
+
+        Raises:
+            KeyError: если в записи нет колонки группировки
+        """
+        if type(self).group_key is not ReportProcessor.group_key:
+            # Наследник считает ключ по-своему: блок группируется так же, как построчно
+            return list(map(self.group_key, chunk))
+        return list(map(itemgetter(self.group_column), chunk))
+
+    def include_group(self, key: Hashable) -> bool:
+        """Проверяет, нужно ли выводить группу в отчет"""
+        return True
+
+    def parse_value(self, raw_value: Any) -> float:
+        """
+        Преобразует значение числовой колонки в float
+
+        Raises:
+            ValueError: если значение некорректно
+        """
+        value_str = str(raw_value)
+        if self.thousands_separator:
+            value_str = value_str.replace(self.thousands_separator, '')
+        return float(value_str.strip())
+
+    def aggregate(self, data: Iterable[Dict[str, Any]], memory_limit: Optional[int] = None) -> GroupAggregator:
+        """
+        Агрегирует записи в частичные агрегаты (сумма, количество) по группам
+
+        Args:
+            data: записи с данными (список или поток строк)
+            memory_limit: лимит памяти на агрегацию (по умолчанию self.memory_limit)
+
+        Returns:
+            GroupAggregator с агрегатами всех групп
+        """
+        aggregator = GroupAggregator(memory_limit or self.memory_limit)
+        # Векторизованный разбор повторяет только стандартный parse_value
+        if self.backend == 'numpy' and type(self).parse_value is ReportProcessor.parse_value:
+            self._aggregate_numpy(data, aggregator)
+        else:
+            self._aggregate_python(data, aggregator)
+        return aggregator
+
+    def _aggregate_python(self, data: Iterable[Dict[str, Any]], aggregator: GroupAggregator) -> None:
+        """Агрегирует записи построчно средствами стандартной библиотеки"""
+        for record in data:
+            key = self.group_key(record)
+            if key is None:
+                continue
+            try:
+                value = self.parse_value(record[self.value_column])
+            except (ValueError, KeyError):
+                value = None  # Некорректное значение, но группа учитывается
+            aggregator.add(key, value)
+
+    def _aggregate_numpy(self, data: Iterable[Dict[str, Any]], aggregator: GroupAggregator) -> None:
+        """Агрегирует записи блоками по vectorized.CHUNK_SIZE строк с помощью NumPy"""
+        chunk_size = vectorized.CHUNK_SIZE
+        if aggregator.memory_limit is not None:
+            # Блок строк тоже занимает память: отдаем ему не больше четверти лимита
+            chunk_size = max(1, min(chunk_size, aggregator.memory_limit // (4 * vectorized.ROW_SIZE_ESTIMATE)))
+
+        rows = iter(data)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            if len(chunk) < vectorized.MIN_CHUNK_SIZE:
+                # Короткий хвост (или весь небольшой файл) быстрее посчитать построчно
+                self._aggregate_python(chunk, aggregator)
+                continue
+
+            try:
+                # В строках csv.DictReader все колонки присутствуют, поэтому обычно
+                # значения извлекаются через itemgetter без обращения к get
+                keys = self.chunk_keys(chunk)
+                raw_values = list(map(itemgetter(self.value_column), chunk))
+            except KeyError:
+                keys = [self.group_key(record) for record in chunk]
+                raw_values = [record.get(self.value_column) for record in chunk]
+
+            if None in keys:
+                pairs = [(key, value) for key, value in zip(keys, raw_values) if key is not None]
+                if not pairs:
+                    continue
+                keys, raw_values = (list(column) for column in zip(*pairs))
+
+            if not self._add_chunk(aggregator, keys, raw_values):
+                # Почти все ключи блока различны: работа со словарем агрегатов на
+                # каждую группу съедает выигрыш NumPy, дальше агрегируем построчно
+                self._aggregate_python(chain(chunk, rows), aggregator)
+                break
+
+    def _add_chunk(self, aggregator: GroupAggregator, keys: List[Hashable], raw_values: List[Any]) -> bool:
+        """
+        Добавляет в агрегатор суммы и количества одного блока строк
+
+        Returns:
+            False, если в блоке слишком много групп и он не агрегирован
+        """
+        return vectorized.aggregate_chunk(aggregator, keys, raw_values, self.thousands_separator)
+
+    def iter_results(self, data: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, float]]:
+        """
+        Обрабатывает данные и отдает результат по одной группе, не накапливая его
+
+        Args:
+            data: записи с данными (список или поток строк)
+
+        Yields:
+            Кортежи (ключ, значение) для отчета
+        """
+        aggregator = self.aggregate(data)
+        try:
+            for key, total, count in aggregator.items():
+                if not self.include_group(key):
+                    continue
+                value = self.finalize(total, count)
+                if value is not None:
+                    yield key, round(value, 2)
+        finally:
+            aggregator.close()
+
+    def process(self, data: Iterable[Dict[str, Any]]) -> List[Tuple[str, float]]:
         """
         Обрабатывает данные и возвращает результат
 
@@ -26,125 +199,203 @@ class ReportProcessor(ABC):
         Returns:
             Список кортежей (ключ, значение) для отчета
         """
-        pass
+        return list(self.iter_results(data))
+
+    def iter_sections(self, data: Iterable[Dict[str, Any]]) -> Dict[Optional[str], Iterable[Tuple[str, float]]]:
+        """
+        Ленивый вариант process_sections: результат раздела можно отбирать
+        (например, первые N значений), не храня его целиком
+
+        Разделы нужно перебирать по порядку, дочитывая каждый до следующего.
+
+        Returns:
+            Словарь {название_раздела: результат}; у обычного отчета один раздел None
+        """
+        if type(self).process is not ReportProcessor.process:
+            # Процессор со своей реализацией process получает, как и раньше, список записей
+            return {None: self.process(data if isinstance(data, list) else list(data))}
+        return {None: self.iter_results(data)}
+
+    def process_sections(self, data: Iterable[Dict[str, Any]]) -> Dict[Optional[str], List[Tuple[str, float]]]:
+        """
+        Обрабатывает данные и возвращает результат по разделам отчета
+
+        Returns:
+            Словарь {название_раздела: результат}; у обычного отчета один раздел None
+        """
+        return {section: list(results) for section, results in self.iter_sections(data).items()}
 
     def execute(self, file_paths: List[str]) -> List[Tuple[str, float]]:
-        """Полный цикл выполнения: чтение и обработка"""
-        data = self.reader.read_files(file_paths)
-        return self.process(data)
+        """Полный цикл выполнения: потоковое чтение и обработка"""
+        return self.process(self.reader.iter_rows(file_paths))
+
+    def execute_sections(self, file_paths: List[str]) -> Dict[Optional[str], List[Tuple[str, float]]]:
+        """Полный цикл выполнения с результатом по разделам отчета"""
+        return self.process_sections(self.reader.iter_rows(file_paths))
 
 
 class AverageGDPProcessor(ReportProcessor):
     """Процессор для расчета среднего ВВП по странам"""
 
+    group_column = 'country'
+    value_column = 'gdp'
+
     @property
     def required_columns(self) -> List[str]:
         return ['country', 'gdp']
 
-    def process(self, data: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
-        # Группируем данные по странам
-        grouped_data = self.reader.group_by_column(data, 'country')
-
-        results = []
-        for country, records in grouped_data.items():
-            gdp_values = []
-            for record in records:
-                try:
-                    # Преобразуем значение gdp в float
-                    gdp_str = str(record['gdp']).replace(',', '').strip()
-                    gdp_value = float(gdp_str)
-                    gdp_values.append(gdp_value)
-                except (ValueError, KeyError):
-                    continue  # Пропускаем некорректные записи
-
-            if gdp_values:
-                avg_gdp = sum(gdp_values) / len(gdp_values)
-                results.append((country, round(avg_gdp, 2)))
-
-        return results
-
 
 class AverageUnemploymentProcessor(ReportProcessor):
     """Процессор для расчета средней безработицы по странам"""
 
+    group_column = 'country'
+    value_column = 'unemployment'
+    thousands_separator = None
+
     @property
     def required_columns(self) -> List[str]:
         return ['country', 'unemployment']
 
-    def process(self, data: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
-        grouped_data = self.reader.group_by_column(data, 'country')
-
-        results = []
-        for country, records in grouped_data.items():
-            unemployment_values = []
-            for record in records:
-                try:
-                    unemployment_str = str(record['unemployment']).strip()
-                    unemployment_value = float(unemployment_str)
-                    unemployment_values.append(unemployment_value)
-                except (ValueError, KeyError):
-                    continue
-
-            if unemployment_values:
-                avg_unemployment = sum(unemployment_values) / len(unemployment_values)
-                results.append((country, round(avg_unemployment, 2)))
-
-        return results
-
 
 class PopulationByContinentProcessor(ReportProcessor):
     """Процессор для расчета населения по континентам"""
 
+    group_column = 'continent'
+    value_column = 'population'
+
     @property
     def required_columns(self) -> List[str]:
         return ['continent', 'population']
 
-    def process(self, data: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
-        grouped_data = self.reader.group_by_column(data, 'continent')
+    def include_group(self, key: Hashable) -> bool:
+        return bool(key)  # Пропускаем пустые значения
 
-        results = []
-        for continent, records in grouped_data.items():
-            if not continent:  # Пропускаем пустые значения
-                continue
+    def finalize(self, total: float, count: int) -> Optional[float]:
+        return total if total > 0 else None
 
-            total_population = 0
-            for record in records:
-                try:
-                    population_str = str(record['population']).replace(',', '').strip()
-                    population_value = float(population_str)
-                    total_population += population_value
-                except (ValueError, KeyError):
-                    continue
 
-            if total_population > 0:
-                # Округляем до миллионов для читаемости
-                results.append((continent, round(total_population, 2)))
+class RollupProcessor(ReportProcessor):
+    """
+    Процессор, считающий показатель сразу на нескольких уровнях иерархии
 
-        return results
+    Данные агрегируются один раз на самом детальном уровне (страна x год),
+    а более крупные уровни выводятся из частичных агрегатов (сумма, количество)
+    без повторного чтения файлов. Показатель задается через наследование
+    от процессора соответствующего отчета.
+    """
 
+    # Колонки самого детального уровня агрегации
+    grain_columns: Tuple[str, ...] = ('country', 'continent', 'year')
 
-# Реестр процессоров для легкого добавления новых отчетов
-PROCESSORS_REGISTRY = {
-    'average-gdp': AverageGDPProcessor,
-    'average-unemployment': AverageUnemploymentProcessor,
-    'population-by-continent': PopulationByContinentProcessor,
-}
+    # Доступные уровни: {название: колонки ключа}; определены в реестре,
+    # чтобы командная строка строила по ним --group-by без импорта процессоров
+    LEVELS: Dict[str, Tuple[str, ...]] = ROLLUP_LEVELS
 
+    DEFAULT_LEVELS: List[str] = DEFAULT_ROLLUP_LEVELS
 
-def get_processor(report_name: str) -> ReportProcessor:
-    """
-    Фабричная функция для получения процессора по имени отчета
+    def __init__(self, levels: Optional[List[str]] = None, **options: Any):
+        """
+        Args:
+            levels: уровни для вывода (по умолчанию DEFAULT_LEVELS)
+            **options: параметры ReportProcessor
+        """
+        super().__init__(**options)
+        self.levels = levels or list(self.DEFAULT_LEVELS)
+
+    @property
+    def required_columns(self) -> List[str]:
+        return [*self.grain_columns, self.value_column]
 
-    Args:
-        report_name: название отчета
+    def group_key(self, record: Dict[str, Any]) -> Optional[Hashable]:
+        key = tuple(record.get(column) for column in self.grain_columns)
+        return None if None in key else key
 
-    Returns:
-        Экземпляр ReportProcessor
+    def chunk_keys(self, chunk: List[Dict[str, Any]]) -> List[Optional[Hashable]]:
+        if type(self).group_key is not RollupProcessor.group_key:
+            return list(map(self.group_key, chunk))
+        keys = list(map(itemgetter(*self.grain_columns), chunk))
+        return [None if None in key else key for key in keys]
 
-    Raises:
-        ValueError: если отчет не найден
-    """
-    processor_class = PROCESSORS_REGISTRY.get(report_name)
-    if not processor_class:
-        raise ValueError(f"Неизвестный тип отчета: {report_name}")
-    return processor_class()
+    def iter_results(self, data: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, float]]:
+        """Отдает результат первого из выбранных уровней"""
+        return next(iter(self._iter_levels(data, self.levels[:1]).values()))
+
+    def iter_sections(self, data: Iterable[Dict[str, Any]]) -> Dict[Optional[str], Iterator[Tuple[str, float]]]:
+        """
+        Агрегирует данные за один проход и выводит из них все выбранные уровни
+
+        Данные читаются при обращении к первому уровню; результат каждого
+        уровня отдается потоком, поэтому с --limit он не хранится целиком.
+
+        Returns:
+            Словарь {уровень: итератор кортежей (ключ, значение)}
+        """
+        return self._iter_levels(data, self.levels)
+
+    def _iter_levels(self, data: Iterable[Dict[str, Any]],
+                     levels: List[str]) -> Dict[Optional[str], Iterator[Tuple[str, float]]]:
+        """Готовит ленивые результаты уровней levels из одного прохода по данным"""
+        for level in levels:
+            if level not in self.LEVELS:
+                raise ValueError(f"Неизвестный уровень группировки: {level}")
+
+        # Индексы колонок каждого уровня в ключе детального уровня
+        projections = {
+            level: [self.grain_columns.index(column) for column in self.LEVELS[level]]
+            for level in levels
+        }
+
+        # Пока сливаются агрегаты детального уровня, уровни накапливают свои,
+        # поэтому детальный уровень и все уровни вместе делят лимит пополам
+        grain_limit = level_limit = None
+        if self.memory_limit is not None:
+            grain_limit = max(1, self.memory_limit // 2)
+            level_limit = max(1, grain_limit // len(levels))
+        level_groups = {level: GroupAggregator(level_limit) for level in levels}
+        aggregated = []
+
+        def aggregate_levels() -> None:
+            aggregator = self.aggregate(data, grain_limit)
+            try:
+                for grain_key, total, count in aggregator.items():
+                    for level, indexes in projections.items():
+                        level_key = tuple(grain_key[i] for i in indexes)
+                        level_groups[level].add_partial(level_key, total, count)
+            finally:
+                aggregator.close()
+
+        def iter_level(level: str) -> Iterator[Tuple[str, float]]:
+            groups = level_groups[level]
+            try:
+                if not aggregated:
+                    aggregated.append(True)
+                    try:
+                        aggregate_levels()
+                    except BaseException:
+                        for other_groups in level_groups.values():
+                            other_groups.close()
+                        raise
+
+                for level_key, total, count in groups.items():
+                    # Записи с пустой частью ключа (например, без континента) не выводятся
+                    if not all(level_key) or not all(self.include_group(part) for part in level_key):
+                        continue
+                    value = self.finalize(total, count)
+                    if value is not None:
+                        yield ' / '.join(level_key), round(value, 2)
+            finally:
+                groups.close()
+
+        return {level: iter_level(level) for level in levels}
+
+
+class GDPRollupProcessor(RollupProcessor, AverageGDPProcessor):
+    """Средний ВВП на нескольких уровнях: страны, континенты, годы"""
+
+
+class UnemploymentRollupProcessor(RollupProcessor, AverageUnemploymentProcessor):
+    """Средняя безработица на нескольких уровнях: страны, континенты, годы"""
+
+
+class PopulationRollupProcessor(RollupProcessor, PopulationByContinentProcessor):
+    """Суммарное население на нескольких уровнях: страны, континенты, годы"""
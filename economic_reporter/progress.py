@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+from typing import List, Optional, TextIO
+
+# Единицы для вывода размеров
+SIZE_SUFFIXES = ['Б', 'КБ', 'МБ', 'ГБ', 'ТБ']
+
+
+def format_size(size: float) -> str:
+    """Форматирует размер в байтах в читаемый вид (например, 1.5 ГБ)"""
+    for suffix in SIZE_SUFFIXES[:-1]:
+        if abs(size) < 1024:
+            return f"{size:.1f} {suffix}"
+        size /= 1024
+    return f"{size:.1f} {SIZE_SUFFIXES[-1]}"
+
+
+def format_duration(seconds: float) -> str:
+    """Форматирует длительность в виде ЧЧ:ММ:СС"""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class ProgressReporter:
+    """
+    Отчет о ходе обработки файлов: байты, строки, скорость и оставшееся время
+
+    Читатель сообщает о прогрессе пачками строк, а сообщение в поток
+    выводится не чаще одного раза в interval секунд, поэтому накладные
+    расходы сводятся к одной проверке времени на пачку.
+    """
+
+    # Через сколько строк читатель сообщает о прогрессе
+    ROWS_PER_UPDATE = 4096
+
+    def __init__(self, stream: Optional[TextIO] = None, interval: float = 1.0):
+        """
+        Args:
+            stream: поток для вывода (по умолчанию sys.stderr)
+            interval: минимальный интервал между сообщениями в секундах
+        """
+        self.stream = stream
+        self.interval = interval
+        self.total_bytes = 0
+        self.bytes_done = 0
+        self.rows_done = 0
+        self._finished_bytes = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+        self._last_rows = 0
+
+    def start(self, file_paths: List[str], passes: int = 1) -> None:
+        """
+        Начинает отсчет по списку файлов
+
+        Args:
+            file_paths: пути к файлам; их суммарный размер - объем одного прохода
+            passes: сколько раз файлы будут прочитаны целиком; байты и строки
+                всех проходов считаются в общий объем работы
+        """
+        self.total_bytes = 0
+        for file_path in file_paths:
+            try:
+                self.total_bytes += os.path.getsize(file_path)
+            except OSError:
+                continue  # Ошибку отсутствующего файла сообщит читатель
+        self.total_bytes *= passes
+        self.bytes_done = 0
+        self.rows_done = 0
+        self._finished_bytes = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+        self._last_rows = 0
+
+    def update(self, rows: int, file_offset: int) -> None:
+        """
+        Учитывает прочитанные строки текущего файла
+
+        Args:
+            rows: количество строк, прочитанных с прошлого вызова
+            file_offset: текущее смещение чтения в файле в байтах
+        """
+        self.rows_done += rows
+        self.bytes_done = self._finished_bytes + file_offset
+
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._report(now)
+
+    def finish_file(self, file_size: int) -> None:
+        """Отмечает текущий файл прочитанным целиком"""
+        self._finished_bytes += file_size
+        self.bytes_done = self._finished_bytes
+
+    def finish(self) -> None:
+        """Выводит итоговое сообщение"""
+        self._report(time.monotonic())
+
+    def summary(self) -> str:
+        """Возвращает краткую сводку о проделанной работе"""
+        percent = self.bytes_done / self.total_bytes * 100 if self.total_bytes else 100.0
+        elapsed = time.monotonic() - self._started
+        return (
+            f"обработано {format_size(self.bytes_done)} из {format_size(self.total_bytes)} "
+            f"({percent:.1f}%), {self.rows_done:,} строк за {format_duration(elapsed)}"
+        )
+
+    def _report(self, now: float) -> None:
+        """Выводит сообщение о прогрессе"""
+        window = now - self._last_report
+        rows_per_second = (self.rows_done - self._last_rows) / window if window > 0 else 0.0
+
+        elapsed = now - self._started
+        remaining_bytes = max(self.total_bytes - self.bytes_done, 0)
+        if self.bytes_done and elapsed > 0:
+            eta = format_duration(remaining_bytes / (self.bytes_done / elapsed))
+        else:
+            eta = '--:--:--'
+
+        stream = self.stream or sys.stderr
+        print(
+            f"Прогресс: {self.summary()}, {rows_per_second:,.0f} строк/с, осталось ~{eta}",
+            file=stream,
+            flush=True,
+        )
+        self._last_report = now
+        self._last_rows = self.rows_done
@@ -1,13 +1,47 @@
 import csv
+import os
+from hashlib import blake2b
 from collections import defaultdict
-from typing import List, Dict, Any, DefaultDict
+from itertools import islice
+from typing import List, Dict, Any, DefaultDict, Iterator, Optional, TextIO
+
+from .prefetch import FilePrefetcher
+from .progress import ProgressReporter
+
+# Количество бит под номер строки в закодированной позиции записи
+_ROW_INDEX_BITS = 40
 
 
 class CSVReader:
     """Класс для чтения и обработки CSV файлов"""
 
-    def __init__(self, required_columns: List[str] = None):
+    # Колонки ключа, по которому удаляются дубликаты записей
+    DEDUPE_COLUMNS = ['country', 'year']
+
+    def __init__(self, required_columns: List[str] = None, progress: Optional[ProgressReporter] = None,
+                 dedupe: Optional[str] = None, prefer: Optional[List[str]] = None,
+                 prefetch_depth: int = 0, prefetch_memory: int = 64 * 1024 ** 2):
+        """
+        Args:
+            required_columns: колонки, обязательные в каждом файле
+            progress: отчет о ходе чтения файлов (None - без отчета)
+            dedupe: удаление дубликатов по (country, year): 'first' оставляет
+                первую запись, 'last' - последнюю (None - не удалять)
+            prefer: файлы, записи которых при дубликатах имеют приоритет
+                (в порядке убывания приоритета)
+            prefetch_depth: сколько файлов читать заранее в фоновых потоках
+                (0 - без упреждающего чтения)
+            prefetch_memory: лимит памяти на буферы упреждающего чтения в байтах
+        """
+        if dedupe not in (None, 'first', 'last'):
+            raise ValueError(f"Неизвестный режим удаления дубликатов: {dedupe}")
         self.required_columns = required_columns or []
+        self.progress = progress
+        self.dedupe = dedupe
+        self.prefer = prefer or []
+        self.prefetch_depth = prefetch_depth
+        self.prefetch_memory = prefetch_memory
+        self.duplicates_dropped = 0
 
     def read_files(self, file_paths: List[str]) -> List[Dict[str, Any]]:
         """
@@ -19,36 +53,181 @@ class CSVReader:
         Returns:
             Список словарей с данными из всех файлов
         """
-        all_data = []
-
-        for file_path in file_paths:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    reader = csv.DictReader(file)
-
-                    # Проверяем наличие необходимых колонок
-                    if self.required_columns:
-                        missing_columns = [
-                            col for col in self.required_columns
-                            if col not in reader.fieldnames
-                        ]
-                        if missing_columns:
-                            raise ValueError(
-                                f"Файл {file_path} не содержит колонок: {missing_columns}"
-                            )
-
-                    # Читаем данные
-                    file_data = list(reader)
-                    all_data.extend(file_data)
-
-            except FileNotFoundError:
-                raise FileNotFoundError(f"Файл не найден: {file_path}")
-            except ValueError:
-                raise
-            except Exception as e:
-                raise RuntimeError(f"Ошибка при чтении файла {file_path}: {e}")
-
-        return all_data
+        return list(self.iter_rows(file_paths))
+
+    def iter_rows(self, file_paths: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Построчно читает данные из нескольких CSV файлов, не накапливая их в памяти
+
+        Args:
+            file_paths: список путей к CSV файлам
+
+        Yields:
+            Словари с данными строк всех файлов по порядку
+            (без дубликатов, если задан режим dedupe)
+        """
+        two_passes = self.dedupe is not None and (self.dedupe != 'first' or bool(self.prefer))
+        if self.progress is not None:
+            # Двухпроходное удаление дубликатов читает файлы дважды
+            self.progress.start(file_paths, passes=2 if two_passes else 1)
+
+        self.duplicates_dropped = 0
+        if self.dedupe is None:
+            for rows in self._iter_files(file_paths):
+                yield from rows
+        elif two_passes:
+            yield from self._iter_winners(file_paths)
+        else:
+            yield from self._iter_first_unique(file_paths)
+
+    def _iter_files(self, file_paths: List[str]) -> Iterator[Iterator[Dict[str, Any]]]:
+        """
+        Отдает по порядку итераторы строк файлов, при необходимости с упреждающим чтением
+
+        Каждый итератор нужно дочитать до запроса следующего.
+
+        Args:
+            file_paths: список путей к CSV файлам
+        """
+        prefetcher = None
+        if self.prefetch_depth > 0:
+            prefetcher = FilePrefetcher(file_paths, depth=self.prefetch_depth, memory_limit=self.prefetch_memory)
+        try:
+            for file_index, file_path in enumerate(file_paths):
+                yield self._read_file(file_path, prefetcher, file_index)
+        finally:
+            if prefetcher is not None:
+                prefetcher.close()
+
+    def _read_file(self, file_path: str, prefetcher: Optional[FilePrefetcher] = None,
+                   file_index: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Читает строки одного CSV файла с проверкой необходимых колонок
+
+        Args:
+            file_path: путь к CSV файлу
+            prefetcher: упреждающее чтение, через которое открывается файл
+            file_index: номер файла в списке prefetcher
+        """
+        required_columns = self.required_columns
+        if self.dedupe is not None:
+            required_columns = required_columns + [
+                col for col in self.DEDUPE_COLUMNS if col not in required_columns
+            ]
+
+        try:
+            if prefetcher is None:
+                file = open(file_path, 'r', encoding='utf-8')
+            else:
+                file = prefetcher.open(file_index)
+            with file:
+                reader = csv.DictReader(file)
+
+                # Проверяем наличие необходимых колонок
+                if required_columns:
+                    missing_columns = [
+                        col for col in required_columns
+                        if col not in reader.fieldnames
+                    ]
+                    if missing_columns:
+                        raise ValueError(
+                            f"Файл {file_path} не содержит колонок: {missing_columns}"
+                        )
+
+                # Читаем данные
+                if self.progress is None:
+                    yield from reader
+                else:
+                    yield from self._iter_with_progress(reader, file)
+                    self.progress.finish_file(os.path.getsize(file_path))
+
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Файл не найден: {file_path}")
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при чтении файла {file_path}: {e}")
+
+    def _iter_with_progress(self, reader: csv.DictReader, file: TextIO) -> Iterator[Dict[str, Any]]:
+        """Отдает строки файла пачками, после каждой сообщая о прогрессе по смещению чтения"""
+        rows_per_update = self.progress.ROWS_PER_UPDATE
+        while True:
+            batch = list(islice(reader, rows_per_update))
+            if not batch:
+                break
+            yield from batch
+            # Смещение берется у двоичного буфера: у текстового файла tell()
+            # недоступен во время итерации
+            self.progress.update(len(batch), file.buffer.tell())
+
+    def _dedupe_key(self, row: Dict[str, Any]) -> Optional[bytes]:
+        """
+        Возвращает компактный хеш ключа (country, year) или None, если ключ неполный
+
+        В индексе хранятся только 128-битные хеши BLAKE2b, а не сами строки
+        ключей. У 64-битного hash() совпадение двух разных ключей (и молчаливая
+        потеря записи) становится заметно вероятным на миллиардах ключей,
+        а у 128-битного хеша остается пренебрежимо малым.
+        """
+        key = tuple(row.get(col) for col in self.DEDUPE_COLUMNS)
+        if None in key:
+            return None
+        # repr кортежа строк однозначен, поэтому разные ключи дают разные байты
+        return blake2b(repr(key).encode('utf-8'), digest_size=16).digest()
+
+    def _iter_first_unique(self, file_paths: List[str]) -> Iterator[Dict[str, Any]]:
+        """Однопроходное удаление дубликатов: остается первая запись каждого ключа"""
+        seen = set()
+        for rows in self._iter_files(file_paths):
+            for row in rows:
+                key = self._dedupe_key(row)
+                if key is None:
+                    yield row
+                elif key in seen:
+                    self.duplicates_dropped += 1
+                else:
+                    seen.add(key)
+                    yield row
+
+    def _iter_winners(self, file_paths: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Двухпроходное удаление дубликатов с учетом режима и приоритета файлов
+
+        Первый проход строит индекс {хеш ключа: позиция выбранной записи},
+        второй отдает только выбранные записи. Память пропорциональна числу
+        различных ключей, а не числу строк.
+        """
+        preferred = [os.path.abspath(path) for path in self.prefer]
+        ranks = [
+            preferred.index(os.path.abspath(path)) if os.path.abspath(path) in preferred else len(preferred)
+            for path in file_paths
+        ]
+        keep_last = self.dedupe == 'last'
+
+        # Позиция записи кодируется одним числом: номер файла и номер строки в нем
+        winners: Dict[bytes, int] = {}
+        for file_index, rows in enumerate(self._iter_files(file_paths)):
+            rank = ranks[file_index]
+            for row_index, row in enumerate(rows):
+                key = self._dedupe_key(row)
+                if key is None:
+                    continue
+                position = (file_index << _ROW_INDEX_BITS) | row_index
+                current = winners.get(key)
+                if (current is None
+                        or rank < ranks[current >> _ROW_INDEX_BITS]
+                        or (keep_last and rank == ranks[current >> _ROW_INDEX_BITS])):
+                    winners[key] = position
+
+        for file_index, rows in enumerate(self._iter_files(file_paths)):
+            for row_index, row in enumerate(rows):
+                key = self._dedupe_key(row)
+                position = (file_index << _ROW_INDEX_BITS) | row_index
+                # Ключ, появившийся в файле после первого прохода, считаем уникальным
+                if key is None or winners.get(key, position) == position:
+                    yield row
+                else:
+                    self.duplicates_dropped += 1
 
     @staticmethod
     def group_by_column(data: List[Dict[str, Any]], column: str) -> DefaultDict[str, List[Dict[str, Any]]]:
@@ -0,0 +1,296 @@
+"""
+Реестр процессоров отчетов с ленивой загрузкой.
+
+Реестр хранит не классы, а ссылки вида "модуль:Класс", поэтому модуль
+процессора импортируется только когда выбран его отчет. Помимо встроенных
+отчетов процессоры подключаются:
+
+- через entry points группы "economic_reporter.processors"
+  (имя entry point - название отчета, значение - "модуль:Класс");
+- из каталогов плагинов, перечисленных в переменной окружения
+  ECONOMIC_REPORTER_PLUGIN_PATH. Плагин - это .py файл с литеральным
+  словарем REPORTS = {'название-отчета': 'ИмяКласса'}.
+
+Найденные плагины сохраняются в индекс в каталоге кеша и пересканируются,
+только если изменились каталоги sys.path или файлы плагинов.
+"""
+
+import ast
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List, Tuple, Type
+
+# Встроенные отчеты: {название: {'spec': 'модуль:Класс', 'description': описание}}
+BUILTIN_REPORTS: Dict[str, Dict[str, str]] = {
+    'average-gdp': {
+        'spec': 'economic_reporter.processors:AverageGDPProcessor',
+        'description': 'Средний ВВП по странам',
+    },
+    'average-unemployment': {
+        'spec': 'economic_reporter.processors:AverageUnemploymentProcessor',
+        'description': 'Средняя безработица по странам',
+    },
+    'population-by-continent': {
+        'spec': 'economic_reporter.processors:PopulationByContinentProcessor',
+        'description': 'Население по континентам',
+    },
+    'gdp-rollup': {
+        'spec': 'economic_reporter.processors:GDPRollupProcessor',
+        'description': 'Средний ВВП по уровням (--group-by)',
+    },
+    'unemployment-rollup': {
+        'spec': 'economic_reporter.processors:UnemploymentRollupProcessor',
+        'description': 'Средняя безработица по уровням (--group-by)',
+    },
+    'population-rollup': {
+        'spec': 'economic_reporter.processors:PopulationRollupProcessor',
+        'description': 'Население по уровням (--group-by)',
+    },
+}
+
+# Уровни rollup-отчетов: {название: колонки ключа}
+ROLLUP_LEVELS: Dict[str, Tuple[str, ...]] = {
+    'country': ('country',),
+    'continent': ('continent',),
+    'year': ('year',),
+    'continent-year': ('continent', 'year'),
+    'country-year': ('country', 'year'),
+}
+
+DEFAULT_ROLLUP_LEVELS: List[str] = ['country', 'continent', 'year', 'continent-year']
+
+ENTRY_POINT_GROUP = 'economic_reporter.processors'
+PLUGIN_PATH_ENV = 'ECONOMIC_REPORTER_PLUGIN_PATH'
+CACHE_DIR_ENV = 'ECONOMIC_REPORTER_CACHE_DIR'
+
+# Версия формата индекса плагинов
+INDEX_VERSION = 1
+
+
+def default_cache_dir() -> str:
+    """Каталог кеша: ECONOMIC_REPORTER_CACHE_DIR или ~/.cache/economic_reporter"""
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir:
+        return cache_dir
+    base_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base_dir, 'economic_reporter')
+
+
+def plugin_dirs() -> List[str]:
+    """Каталоги плагинов из переменной окружения ECONOMIC_REPORTER_PLUGIN_PATH"""
+    return [path for path in os.environ.get(PLUGIN_PATH_ENV, '').split(os.pathsep) if path]
+
+
+def available_reports() -> Dict[str, str]:
+    """
+    Возвращает все доступные отчеты без импорта их модулей
+
+    Returns:
+        Словарь {название_отчета: описание}
+    """
+    return {name: entry['description'] for name, entry in _all_reports().items()}
+
+
+def get_processor_class(report_name: str) -> Type[Any]:
+    """
+    Импортирует и возвращает класс процессора отчета
+
+    Args:
+        report_name: название отчета
+
+    Raises:
+        ValueError: если отчет не найден
+    """
+    entry = _all_reports().get(report_name)
+    if entry is None:
+        raise ValueError(f"Неизвестный тип отчета: {report_name}")
+
+    module_ref, _, class_name = entry['spec'].rpartition(':')
+    if module_ref.endswith('.py'):
+        module = _import_plugin_file(module_ref)
+    else:
+        module = importlib.import_module(module_ref)
+    return getattr(module, class_name)
+
+
+def get_processor(report_name: str, **options: Any) -> Any:
+    """
+    Фабричная функция для получения процессора по имени отчета
+
+    Args:
+        report_name: название отчета
+        **options: параметры конструктора процессора (например, memory_limit)
+
+    Returns:
+        Экземпляр ReportProcessor
+
+    Raises:
+        ValueError: если отчет не найден
+    """
+    return get_processor_class(report_name)(**options)
+
+
+def _all_reports() -> Dict[str, Dict[str, str]]:
+    """Встроенные отчеты и отчеты из плагинов (встроенные имеют приоритет)"""
+    reports = dict(_load_plugin_index())
+    reports.update(BUILTIN_REPORTS)
+    return reports
+
+
+def _load_plugin_index() -> Dict[str, Dict[str, str]]:
+    """Читает индекс плагинов из кеша или пересобирает его, если он устарел"""
+    fingerprint = _fingerprint()
+    index_path = os.path.join(default_cache_dir(), 'plugins.json')
+
+    try:
+        with open(index_path, 'r', encoding='utf-8') as file:
+            index = json.load(file)
+        if index.get('version') == INDEX_VERSION and index.get('fingerprint') == fingerprint:
+            return index['reports']
+    except (OSError, ValueError, KeyError):
+        pass  # Индекса нет или он поврежден - пересобираем
+
+    reports = _scan_entry_points()
+    reports.update(_scan_plugin_dirs())
+
+    # Индекс записывается во временный файл и атомарно подменяется через
+    # os.replace, чтобы одновременный запуск не прочитал его наполовину
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(index_path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump({'version': INDEX_VERSION, 'fingerprint': fingerprint, 'reports': reports}, file)
+        os.replace(tmp_path, index_path)
+    except OSError:
+        # Без кеша индекс просто будет пересобираться при каждом запуске
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    return reports
+
+
+def _fingerprint() -> List[List[Any]]:
+    """
+    Отпечаток источников плагинов: время изменения каталогов sys.path
+    (меняется при установке пакетов) и файлов в каталогах плагинов
+    """
+    fingerprint = []
+    for path in sys.path:
+        try:
+            fingerprint.append([path, os.stat(path or '.').st_mtime_ns])
+        except OSError:
+            continue
+
+    for plugin_dir in plugin_dirs():
+        try:
+            names = sorted(os.listdir(plugin_dir))
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith('.py'):
+                path = os.path.abspath(os.path.join(plugin_dir, name))
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Например, битая символическая ссылка; сканирование ее пропустит
+                fingerprint.append([path, stat.st_mtime_ns, stat.st_size])
+    return fingerprint
+
+
+def _scan_entry_points() -> Dict[str, Dict[str, str]]:
+    """Находит процессоры, объявленные через entry points установленных пакетов"""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python 3.7
+        return {}
+
+    all_entry_points = entry_points()
+    if hasattr(all_entry_points, 'select'):
+        group = all_entry_points.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = all_entry_points.get(ENTRY_POINT_GROUP, [])
+
+    return {
+        entry_point.name: {
+            'spec': entry_point.value,
+            'description': f"Отчет из entry point {entry_point.value}",
+        }
+        for entry_point in group
+    }
+
+
+def _scan_plugin_dirs() -> Dict[str, Dict[str, str]]:
+    """Находит процессоры в каталогах плагинов, не импортируя их модули"""
+    reports = {}
+    for plugin_dir in plugin_dirs():
+        try:
+            names = sorted(os.listdir(plugin_dir))
+        except OSError:
+            continue
+        for name in names:
+            if not name.endswith('.py'):
+                continue
+            path = os.path.abspath(os.path.join(plugin_dir, name))
+            try:
+                declared = _read_plugin_reports(path)
+            except (OSError, SyntaxError, ValueError) as e:
+                print(f"Предупреждение: плагин {path} пропущен: {e}", file=sys.stderr)
+                continue
+            for report_name, class_name in declared.items():
+                reports[report_name] = {
+                    'spec': f"{path}:{class_name}",
+                    'description': f"Отчет из плагина {name}",
+                }
+    return reports
+
+
+def _read_plugin_reports(path: str) -> Dict[str, str]:
+    """
+    Читает словарь REPORTS из файла плагина через разбор AST
+
+    Raises:
+        ValueError: если REPORTS отсутствует или не является словарем строк
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        tree = ast.parse(file.read(), filename=path)
+
+    for node in tree.body:
+        if (isinstance(node, ast.Assign)
+                and any(isinstance(target, ast.Name) and target.id == 'REPORTS' for target in node.targets)):
+            reports = ast.literal_eval(node.value)
+            if (not isinstance(reports, dict)
+                    or not all(isinstance(k, str) and isinstance(v, str) for k, v in reports.items())):
+                raise ValueError("REPORTS должен быть словарем {название: имя класса}")
+            return reports
+
+    raise ValueError("не найден словарь REPORTS")
+
+
+def _import_plugin_file(path: str) -> Any:
+    """
+    Импортирует файл плагина как модуль
+
+    Имя модуля включает хеш полного пути: одноименные файлы из разных
+    каталогов плагинов не должны подменять друг друга в sys.modules.
+    """
+    path_hash = hashlib.blake2b(path.encode('utf-8'), digest_size=8).hexdigest()
+    module_name = f"economic_reporter_plugin_{os.path.splitext(os.path.basename(path))[0]}_{path_hash}"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None:
+        raise ValueError(f"Не удалось загрузить плагин: {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
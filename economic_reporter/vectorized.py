@@ -0,0 +1,158 @@
+"""
+Векторизованная агрегация на NumPy.
+
+NumPy не является обязательной зависимостью: если он не установлен,
+процессоры используют реализацию на стандартной библиотеке. Сам NumPy
+импортируется только при первой векторизованной агрегации, чтобы не
+замедлять запуск на небольших входных данных.
+"""
+
+import importlib.util
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .aggregator import GroupAggregator
+
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+# Бэкенд агрегации по умолчанию
+DEFAULT_BACKEND = 'numpy' if HAS_NUMPY else 'python'
+
+# Количество строк, агрегируемых за одну векторизованную операцию
+CHUNK_SIZE = 65536
+
+# Блоки меньше этого размера выгоднее агрегировать без NumPy
+MIN_CHUNK_SIZE = 4096
+
+# Если различных групп в блоке больше этой доли строк, NumPy не быстрее
+# построчной агрегации: словарь агрегатов все равно обновляется на каждую группу
+MAX_GROUP_RATIO = 0.5
+
+# Приблизительная память на одну строку блока: словарь строки csv.DictReader
+# со значениями, ключ и значение в списках блока и элементы массивов
+ROW_SIZE_ESTIMATE = 1024
+
+# Символ для склейки значений блока при удалении разделителя разрядов
+_CHUNK_DELIMITER = '\0'
+
+
+def parse_values(raw_values: List[Any], thousands_separator: Optional[str] = None) -> Tuple[Any, Any]:
+    """
+    Преобразует значения числовой колонки в массив float64
+
+    Args:
+        raw_values: исходные значения (строки или None)
+        thousands_separator: разделитель разрядов, удаляемый перед преобразованием
+
+    Returns:
+        Кортеж (значения, маска корректных значений)
+    """
+    import numpy as np
+
+    try:
+        strings = raw_values
+        if thousands_separator:
+            # Одна замена на весь блок вместо вызова replace на каждое значение;
+            # если разделителя в блоке нет, значения не копируются вовсе
+            joined = _CHUNK_DELIMITER.join(raw_values)
+            if thousands_separator in joined:
+                strings = joined.replace(thousands_separator, '').split(_CHUNK_DELIMITER)
+                if len(strings) != len(raw_values):
+                    raise ValueError("Разделитель блока встретился в значениях")
+        # float сам отбрасывает пробелы по краям, поэтому отдельный strip не нужен
+        values = np.fromiter(map(float, strings), dtype=np.float64, count=len(raw_values))
+        return values, np.ones(len(values), dtype=bool)
+    except (ValueError, TypeError, AttributeError):
+        pass
+
+    # В блоке есть некорректные значения - разбираем поэлементно
+    values = np.zeros(len(raw_values), dtype=np.float64)
+    valid = np.zeros(len(raw_values), dtype=bool)
+    for i, value in enumerate(raw_values):
+        value_str = str(value)
+        if thousands_separator:
+            value_str = value_str.replace(thousands_separator, '')
+        try:
+            values[i] = float(value_str.strip())
+            valid[i] = True
+        except ValueError:
+            continue
+    return values, valid
+
+
+def factorize(keys: List[Hashable], max_groups: Optional[int] = None) -> Optional[Tuple[List[Hashable], Any]]:
+    """
+    Кодирует ключи целыми числами в порядке их первого появления
+
+    Args:
+        keys: ключи
+        max_groups: максимальное количество различных ключей (None - без ограничения)
+
+    Returns:
+        Кортеж (уникальные ключи, массив кодов) или None, если ключей больше max_groups
+    """
+    import numpy as np
+
+    index: Dict[Hashable, int] = dict.fromkeys(keys)
+    if max_groups is not None and len(index) > max_groups:
+        return None
+    for code, key in enumerate(index):
+        index[key] = code
+    codes = np.fromiter(map(index.__getitem__, keys), dtype=np.intp, count=len(keys))
+    return list(index), codes
+
+
+def aggregate_chunk(aggregator: GroupAggregator, keys: List[Hashable], raw_values: List[Any],
+                    thousands_separator: Optional[str] = None) -> bool:
+    """
+    Добавляет в агрегатор суммы и количества корректных значений блока строк
+
+    Ключи факторизуются в целочисленные коды, а суммы и количества
+    считаются через np.bincount. bincount складывает веса строго по
+    порядку строк, поэтому, если первым весом группы поставить ее текущую
+    сумму, результат побитово совпадает с последовательным сложением
+    на стандартной библиотеке.
+
+    Args:
+        aggregator: агрегатор, в который добавляются значения
+        keys: ключи группировки строк
+        raw_values: значения числовой колонки строк
+        thousands_separator: разделитель разрядов, удаляемый перед преобразованием
+
+    Returns:
+        False, если различных групп в блоке больше MAX_GROUP_RATIO строк:
+        тогда блок не агрегируется, и его выгоднее агрегировать построчно
+    """
+    import numpy as np
+
+    factorized = factorize(keys, int(len(keys) * MAX_GROUP_RATIO))
+    if factorized is None:
+        return False
+    unique_keys, codes = factorized
+    values, valid = parse_values(raw_values, thousands_separator)
+    entries = aggregator.entries(unique_keys)
+
+    group_count = len(unique_keys)
+    seeds = np.fromiter((0 if entry is None else entry[1] for entry in entries),
+                        dtype=np.float64, count=group_count)
+    valid_codes = codes[valid]
+    totals = np.bincount(
+        np.concatenate((np.arange(group_count), valid_codes)),
+        weights=np.concatenate((seeds, values[valid])),
+        minlength=group_count,
+    ).tolist()
+    counts = np.bincount(valid_codes, minlength=group_count).tolist()
+
+    spilled = False
+    for entry, total, count in zip(entries, totals, counts):
+        if entry is None:
+            spilled = True
+        elif count:
+            entry[1] = total
+            entry[2] += count
+
+    if spilled:
+        # Группы, не поместившиеся в память, получают значения по одному в порядке строк
+        in_memory = np.array([entry is not None for entry in entries])
+        for i in np.flatnonzero(~in_memory[codes]).tolist():
+            aggregator.add(keys[i], float(values[i]) if valid[i] else None)
+    return True
@@ -9,6 +9,10 @@ setup(
 
     # Зависимости для разработки
     extras_require={
+        # Векторизованный бэкенд агрегации (необязателен)
+        'numpy': [
+            'numpy>=1.17',
+        ],
         'dev': [
             'pytest>=7.4.0',
             'pytest-cov>=4.1.0',
@@ -1,17 +1,37 @@
+import argparse
+import io
+import os
+import sys
 import pytest
 import tempfile
+import tracemalloc
 import csv
 from pathlib import Path
 
 from economic_reporter.reader import CSVReader
+from economic_reporter.aggregator import GroupAggregator
+from economic_reporter.progress import ProgressReporter
+from economic_reporter.prefetch import FilePrefetcher
 from economic_reporter.processors import (
     AverageGDPProcessor,
     AverageUnemploymentProcessor,
     PopulationByContinentProcessor,
+    GDPRollupProcessor,
+    UnemploymentRollupProcessor,
+    RollupProcessor,
     get_processor
 )
 from economic_reporter.formatter import TableFormatter
-from economic_reporter.cli import parse_args
+from economic_reporter import registry
+from economic_reporter.cache import ResultCache
+from economic_reporter.cli import parse_args, parse_size
+from economic_reporter import vectorized
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Каталог кеша во временной папке, чтобы тесты не писали в ~/.cache"""
+    monkeypatch.setenv(registry.CACHE_DIR_ENV, str(tmp_path / "cache"))
 
 
 class TestCSVReader:
@@ -105,6 +125,44 @@ class TestCSVReader:
         with pytest.raises(RuntimeError, match="Ошибка при чтении файла"):
             reader.read_files(["test.csv"])
 
+    @pytest.fixture
+    def overlapping_files(self, tmp_path):
+        """Fixture с двумя файлами, пересекающимися по (country, year)"""
+        old_file = tmp_path / "old.csv"
+        old_file.write_text("country,year,gdp\nUSA,2023,100\nChina,2023,50\n", encoding='utf-8')
+        new_file = tmp_path / "new.csv"
+        new_file.write_text("country,year,gdp\nUSA,2023,110\nUSA,2022,90\n", encoding='utf-8')
+        return [str(old_file), str(new_file)]
+
+    @pytest.mark.parametrize('mode, expected_gdp', [('first', '100'), ('last', '110')])
+    def test_dedupe_modes(self, overlapping_files, mode, expected_gdp):
+        """Тест удаления дубликатов по (country, year)"""
+        reader = CSVReader(dedupe=mode)
+        data = reader.read_files(overlapping_files)
+
+        usa_2023 = [row['gdp'] for row in data if (row['country'], row['year']) == ('USA', '2023')]
+        assert usa_2023 == [expected_gdp]
+        assert len(data) == 3
+        assert reader.duplicates_dropped == 1
+
+    def test_dedupe_prefer_file(self, overlapping_files):
+        """Тест приоритета файла при удалении дубликатов"""
+        old_file, _ = overlapping_files
+        reader = CSVReader(dedupe='last', prefer=[old_file])
+        data = reader.read_files(overlapping_files)
+
+        usa_2023 = [row['gdp'] for row in data if (row['country'], row['year']) == ('USA', '2023')]
+        assert usa_2023 == ['100']
+        assert reader.duplicates_dropped == 1
+
+    def test_dedupe_requires_key_columns(self, tmp_path):
+        """Тест удаления дубликатов в файле без колонки year"""
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("country,gdp\nUSA,100\n", encoding='utf-8')
+
+        with pytest.raises(ValueError, match="не содержит колонок"):
+            CSVReader(dedupe='first').read_files([str(csv_file)])
+
     def test_extract_numeric_column(self):
         """Тест извлечения числовых значений по колонке"""
         data = [
@@ -121,6 +179,162 @@ class TestCSVReader:
         assert result['USA'][0] == 25000.0
 
 
+class TestFilePrefetcher:
+    """Тесты для FilePrefetcher"""
+
+    @pytest.fixture
+    def csv_files(self, tmp_path):
+        """Fixture с несколькими CSV файлами"""
+        paths = []
+        for i in range(4):
+            csv_file = tmp_path / f"data{i}.csv"
+            rows = ''.join(f"Country{j},{i * 1000 + j}\n" for j in range(5000))
+            csv_file.write_text("country,gdp\n" + rows, encoding='utf-8')
+            paths.append(str(csv_file))
+        return paths
+
+    def test_prefetched_content_matches_file(self, csv_files):
+        """Тест чтения блоками с лимитом памяти меньше блока"""
+        prefetcher = FilePrefetcher(csv_files, depth=2, memory_limit=1, block_size=1)
+        try:
+            for i, path in enumerate(csv_files):
+                with prefetcher.open(i) as file:
+                    assert file.read() == Path(path).read_text(encoding='utf-8')
+        finally:
+            prefetcher.close()
+
+    def test_reader_with_prefetch(self, csv_files):
+        """Тест CSVReader с упреждающим чтением: строки те же, что и без него"""
+        expected = CSVReader(['country', 'gdp']).read_files(csv_files)
+        data = CSVReader(['country', 'gdp'], prefetch_depth=3, prefetch_memory=1).read_files(csv_files)
+
+        assert data == expected
+
+    def test_reader_with_prefetch_file_not_found(self, csv_files):
+        """Тест ошибки отсутствующего файла при упреждающем чтении"""
+        reader = CSVReader(prefetch_depth=2)
+
+        with pytest.raises(FileNotFoundError, match="Файл не найден"):
+            reader.read_files([csv_files[0], "non_existent_file.csv"])
+
+
+class TestProgressReporter:
+    """Тесты для ProgressReporter"""
+
+    def test_reader_reports_progress(self, tmp_path):
+        """Тест подсчета строк и байт при чтении с прогрессом"""
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("country,gdp\n" + "USA,25000\n" * 10000, encoding='utf-8')
+
+        stream = io.StringIO()
+        progress = ProgressReporter(stream=stream, interval=0)
+        reader = CSVReader(progress=progress)
+        data = reader.read_files([str(csv_file)])
+
+        assert len(data) == 10000
+        assert progress.rows_done == 10000
+        assert progress.bytes_done == progress.total_bytes == csv_file.stat().st_size
+        assert 'Прогресс:' in stream.getvalue()
+
+    def test_two_pass_dedupe_reports_both_passes(self, tmp_path):
+        """Тест прогресса двухпроходного удаления дубликатов: оба прохода против удвоенного объема"""
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("country,year,gdp\n" + "USA,2023,25000\n" * 10000, encoding='utf-8')
+
+        stream = io.StringIO()
+        progress = ProgressReporter(stream=stream, interval=0)
+        reader = CSVReader(progress=progress, dedupe='last')
+        data = reader.read_files([str(csv_file)])
+
+        assert len(data) == 1
+        assert progress.total_bytes == 2 * csv_file.stat().st_size
+        assert progress.bytes_done == progress.total_bytes
+        assert progress.rows_done == 20000
+        # Процент растет монотонно через оба прохода и не превышает 100
+        percents = [float(line.split('(')[1].split('%')[0]) for line in stream.getvalue().splitlines()]
+        assert percents == sorted(percents) and percents[-1] <= 100.0
+
+    def test_summary(self):
+        """Тест сводки о проделанной работе"""
+        progress = ProgressReporter(stream=io.StringIO())
+        progress.total_bytes = 2048
+        progress.update(rows=10, file_offset=1024)
+
+        assert '1.0 КБ из 2.0 КБ (50.0%)' in progress.summary()
+        assert '10 строк' in progress.summary()
+
+
+class TestGroupAggregator:
+    """Тесты для GroupAggregator"""
+
+    def test_aggregate_in_memory(self):
+        """Тест агрегации без лимита памяти"""
+        aggregator = GroupAggregator()
+        aggregator.add('USA', 1.0)
+        aggregator.add('China', None)  # Только регистрирует группу
+        aggregator.add('USA', 2.0)
+
+        assert list(aggregator.items()) == [('USA', 3.0, 2), ('China', 0, 0)]
+        assert aggregator.spill_count == 0
+
+    def test_spill_preserves_results_and_order(self):
+        """Тест сброса агрегатов на диск: результат и порядок групп не меняются"""
+        keys = [f'Country{i % 500}' for i in range(5000)]
+
+        in_memory = GroupAggregator()
+        spilled = GroupAggregator(memory_limit=10_000, partitions=4)
+        for i, key in enumerate(keys):
+            in_memory.add(key, float(i))
+            spilled.add(key, float(i))
+
+        assert spilled.spill_count > 0
+        assert list(spilled.items()) == list(in_memory.items())
+        spilled.close()
+
+    def test_peak_memory_within_limit(self):
+        """Тест лимита памяти: ни накопление, ни слияние секций его не превышают"""
+        memory_limit = 256 * 1024
+        keys = [f'Country{i * 7919 % 5000}' for i in range(10000)]
+
+        tracemalloc.start()
+        try:
+            aggregator = GroupAggregator(memory_limit=memory_limit)
+            for i, key in enumerate(keys):
+                aggregator.add(key, float(i))
+            add_peak = tracemalloc.get_traced_memory()[1]
+
+            tracemalloc.reset_peak()
+            groups = sum(1 for _ in aggregator.items())
+            merge_peak = tracemalloc.get_traced_memory()[1]
+            aggregator.close()
+        finally:
+            tracemalloc.stop()
+
+        assert groups == 5000
+        assert aggregator.spill_count > 0
+        assert add_peak < memory_limit
+        assert merge_peak < memory_limit
+
+    def test_spill_keeps_sequential_sum(self):
+        """Тест сброса на диск: сумма группы совпадает с последовательным sum() по ее значениям"""
+        # Последовательное сложение дает 20.500000000000004, а не точные 20.5
+        values = [5.59, 5.19, 7.17, 2.55]
+
+        for ordered in (values, values[::-1], [values[2], values[0], values[3], values[1]]):
+            in_memory = GroupAggregator()
+            spilled = GroupAggregator(memory_limit=1)
+            spilled.add('First', 1.0)  # Занимает память, поэтому USA уходит на диск
+            for i, value in enumerate(ordered):
+                in_memory.add('USA', value)
+                spilled.add('USA', value)
+                spilled.add(f'Other{i}', 1.0)
+
+            assert spilled.spill_count > 0
+            assert next(in_memory.items())[1] == sum(ordered)
+            assert dict((key, total) for key, total, _ in spilled.items())['USA'] == sum(ordered)
+            spilled.close()
+
+
 class TestProcessors:
     """Тесты для процессоров отчетов"""
 
@@ -201,6 +415,220 @@ class TestProcessors:
         with pytest.raises(ValueError, match="Неизвестный тип отчета"):
             get_processor("non-existent-report")
 
+    def test_processor_with_memory_limit(self, sample_data):
+        """Тест процессора с лимитом памяти: результат совпадает с обычным"""
+        data = sample_data * 100
+
+        expected = AverageGDPProcessor().process(data)
+        results = AverageGDPProcessor(memory_limit=1).process(data)
+
+        assert results == expected
+
+    @pytest.mark.parametrize('backend', ['python', 'numpy'])
+    @pytest.mark.parametrize('memory_limit', [None, 1])
+    def test_average_matches_sequential_sum(self, memory_limit, backend, monkeypatch):
+        """Тест среднего на границе округления .xx5: то же, что sum() / len() по записям"""
+        if backend == 'numpy':
+            pytest.importorskip('numpy')
+            monkeypatch.setattr(vectorized, 'MIN_CHUNK_SIZE', 0)
+        values = ['5.59', '5.19', '7.17', '2.55']
+        data = []
+        for i, unemployment in enumerate(values):
+            data.append({'country': f'Other{i}', 'unemployment': '1.0'})
+            data.append({'country': 'USA', 'unemployment': unemployment})
+
+        processor = AverageUnemploymentProcessor(memory_limit=memory_limit)
+        processor.backend = backend
+        results = dict(processor.process(data))
+
+        # Последовательное сложение дает 20.500000000000004, поэтому среднее
+        # округляется до 5.13, как и при группировке всех записей в памяти
+        assert results['USA'] == round(sum(map(float, values)) / len(values), 2) == 5.13
+
+    def test_rollup_processor_levels(self):
+        """Тест rollup-процессора: все уровни из одного прохода"""
+        data = [
+            {'country': 'USA', 'continent': 'North America', 'year': '2022', 'gdp': '100'},
+            {'country': 'USA', 'continent': 'North America', 'year': '2023', 'gdp': '200'},
+            {'country': 'Canada', 'continent': 'North America', 'year': '2023', 'gdp': '30'},
+            {'country': 'China', 'continent': 'Asia', 'year': '2023', 'gdp': '50'},
+        ]
+
+        processor = GDPRollupProcessor(levels=['country', 'continent', 'continent-year'])
+        sections = processor.process_sections(data)
+
+        assert list(sections) == ['country', 'continent', 'continent-year']
+        assert dict(sections['country'])['USA'] == pytest.approx(150.0)
+        assert dict(sections['continent'])['North America'] == pytest.approx(110.0)
+        assert dict(sections['continent-year'])['North America / 2023'] == pytest.approx(115.0)
+
+    def test_rollup_processor_memory_limit(self, monkeypatch):
+        """Тест rollup-процессора с лимитом памяти: уровни отдаются потоком, агрегаты закрываются"""
+        from economic_reporter import processors
+        data = [
+            {'country': f'Country{i % 300}', 'continent': f'Continent{i % 7}', 'year': str(2000 + i % 5),
+             'gdp': str(i % 97 + 0.1)}
+            for i in range(3000)
+        ]
+        levels = ['country-year', 'continent', 'year']
+        expected = GDPRollupProcessor(levels=levels).process_sections(data)
+
+        aggregators = []
+
+        class TrackedAggregator(processors.GroupAggregator):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                aggregators.append(self)
+
+        monkeypatch.setattr(processors, 'GroupAggregator', TrackedAggregator)
+        sections = GDPRollupProcessor(levels=levels, memory_limit=4096).iter_sections(data)
+
+        # Данные еще не читались: агрегатор детального уровня не создан
+        assert len(aggregators) == len(levels)
+        assert not any(isinstance(results, list) for results in sections.values())
+        assert {level: list(results) for level, results in sections.items()} == expected
+        assert len(aggregators) == len(levels) + 1
+        assert all(aggregator.memory_limit is not None for aggregator in aggregators)
+        assert sum(aggregator.spill_count for aggregator in aggregators) > 0
+        assert all(aggregator._spill_files is None for aggregator in aggregators)
+
+    @pytest.mark.parametrize('processor_class', [GDPRollupProcessor, UnemploymentRollupProcessor])
+    def test_rollup_processor_skips_empty_key_parts(self, processor_class):
+        """Тест rollup-процессора: записи без континента не дают строку с пустым названием"""
+        data = [
+            {'country': 'USA', 'continent': 'North America', 'year': '2023', 'gdp': '100', 'unemployment': '4'},
+            {'country': 'Atlantis', 'continent': '', 'year': '2023', 'gdp': '50', 'unemployment': '2'},
+        ]
+
+        processor = processor_class(levels=['country', 'continent', 'continent-year'])
+        sections = processor.process_sections(data)
+
+        assert [name for name, _ in sections['country']] == ['USA', 'Atlantis']
+        assert [name for name, _ in sections['continent']] == ['North America']
+        assert [name for name, _ in sections['continent-year']] == ['North America / 2023']
+
+    def test_rollup_processor_invalid_level(self):
+        """Тест rollup-процессора с неизвестным уровнем"""
+        processor = GDPRollupProcessor(levels=['planet'])
+
+        with pytest.raises(ValueError, match="Неизвестный уровень группировки"):
+            processor.process_sections([])
+
+    @pytest.mark.parametrize('processor_class', [
+        AverageGDPProcessor,
+        AverageUnemploymentProcessor,
+        PopulationByContinentProcessor,
+        GDPRollupProcessor,
+    ])
+    def test_numpy_backend_matches_python(self, processor_class, monkeypatch):
+        """Тест векторизованного бэкенда: результат совпадает с чистым Python"""
+        pytest.importorskip('numpy')
+        # Иначе блок из нескольких строк (почти все ключи различны) агрегируется без NumPy
+        monkeypatch.setattr(vectorized, 'MIN_CHUNK_SIZE', 0)
+        monkeypatch.setattr(vectorized, 'MAX_GROUP_RATIO', 1)
+        chunk_sizes = []
+        aggregate_chunk = vectorized.aggregate_chunk
+
+        def spy_aggregate_chunk(aggregator, keys, raw_values, thousands_separator=None):
+            chunk_sizes.append(len(keys))
+            aggregated = aggregate_chunk(aggregator, keys, raw_values, thousands_separator)
+            assert aggregated
+            return aggregated
+
+        monkeypatch.setattr(vectorized, 'aggregate_chunk', spy_aggregate_chunk)
+        data = [
+            {'country': 'USA', 'gdp': '25,000', 'unemployment': '3.5', 'population': '350',
+             'continent': 'North America', 'year': '2023'},
+            {'country': 'USA', 'gdp': 'invalid', 'unemployment': ' 3.7 ', 'population': '351',
+             'continent': 'North America', 'year': '2022'},
+            {'country': 'China', 'gdp': '18000', 'unemployment': '', 'population': None,
+             'continent': 'Asia', 'year': '2023'},
+            {'country': 'Chad', 'gdp': '', 'unemployment': 'n/a', 'population': '18',
+             'continent': '', 'year': '2023'},
+        ]
+
+        python_processor = processor_class()
+        python_processor.backend = 'python'
+        numpy_processor = processor_class()
+        numpy_processor.backend = 'numpy'
+
+        expected = python_processor.process(data)
+        results = numpy_processor.process(data)
+
+        assert chunk_sizes
+        assert results == expected
+
+    def test_numpy_backend_uses_overridden_group_key(self, monkeypatch):
+        """Тест векторизованного бэкенда с переопределенным group_key"""
+        pytest.importorskip('numpy')
+        monkeypatch.setattr(vectorized, 'MIN_CHUNK_SIZE', 0)
+
+        class UpperCountryProcessor(AverageGDPProcessor):
+            def group_key(self, record):
+                return record['country'].upper()
+
+        data = [
+            {'country': 'usa', 'gdp': '100'},
+            {'country': 'USA', 'gdp': '300'},
+            {'country': 'China', 'gdp': '50'},
+            {'country': 'china', 'gdp': '70'},
+        ]
+
+        python_processor = UpperCountryProcessor()
+        python_processor.backend = 'python'
+        numpy_processor = UpperCountryProcessor()
+        numpy_processor.backend = 'numpy'
+
+        assert numpy_processor.process(data) == python_processor.process(data) == [('USA', 200.0), ('CHINA', 60.0)]
+
+    def test_numpy_backend_falls_back_on_many_groups(self, monkeypatch):
+        """Тест векторизованного бэкенда: блок с почти уникальными ключами агрегируется построчно"""
+        pytest.importorskip('numpy')
+        monkeypatch.setattr(vectorized, 'MIN_CHUNK_SIZE', 0)
+        monkeypatch.setattr(vectorized, 'CHUNK_SIZE', 4)
+        aggregated_chunks = []
+        aggregate_chunk = vectorized.aggregate_chunk
+
+        def spy_aggregate_chunk(aggregator, keys, raw_values, thousands_separator=None):
+            aggregated_chunks.append(aggregate_chunk(aggregator, keys, raw_values, thousands_separator))
+            return aggregated_chunks[-1]
+
+        monkeypatch.setattr(vectorized, 'aggregate_chunk', spy_aggregate_chunk)
+        data = [{'country': f'Country{i % 6}', 'gdp': str(i)} for i in range(12)]
+        data[1]['country'] = None
+
+        python_processor = AverageGDPProcessor()
+        python_processor.backend = 'python'
+        numpy_processor = AverageGDPProcessor()
+        numpy_processor.backend = 'numpy'
+
+        expected = python_processor.process(data)
+        results = numpy_processor.process(data)
+
+        # В первом блоке 3 различных ключа на 3 строки: он и все остальные агрегируются построчно
+        assert aggregated_chunks == [False]
+        assert results == expected
+
+    @pytest.mark.parametrize('raw_values', [
+        ['1,000', ' 2.5 ', '3'],  # Все значения корректны - замена по всему блоку
+        ['1,000', ' 2.5 ', '3', 'n/a', '', None],  # Есть некорректные - поэлементный разбор
+    ])
+    def test_parse_values(self, raw_values):
+        """Тест разбора числовой колонки на NumPy с разделителем разрядов"""
+        pytest.importorskip('numpy')
+        values, valid = vectorized.parse_values(raw_values, thousands_separator=',')
+
+        assert values[valid].tolist() == [1000.0, 2.5, 3.0]
+        assert valid.tolist() == [True, True, True] + [False] * (len(raw_values) - 3)
+
+    def test_parse_values_without_separator(self):
+        """Тест разбора без разделителя разрядов: запятая делает значение некорректным"""
+        pytest.importorskip('numpy')
+        values, valid = vectorized.parse_values(['1,000', '2.5'])
+
+        assert valid.tolist() == [False, True]
+        assert values[valid].tolist() == [2.5]
+
     def test_processors_with_empty_data(self):
         """Тест процессоров с пустыми данными"""
         processor = AverageGDPProcessor()
@@ -208,6 +636,226 @@ class TestProcessors:
         assert results == []
 
 
+class TestRegistry:
+    """Тесты для реестра процессоров и плагинов"""
+
+    @pytest.fixture
+    def plugin_dir(self, tmp_path, monkeypatch):
+        """Fixture с каталогом плагинов"""
+        plugins = tmp_path / "plugins"
+        plugins.mkdir()
+        (plugins / "inhouse.py").write_text(
+            "from economic_reporter.processors import AverageGDPProcessor\n"
+            "\n"
+            "REPORTS = {'inhouse-gdp': 'InhouseGDPProcessor'}\n"
+            "\n"
+            "\n"
+            "class InhouseGDPProcessor(AverageGDPProcessor):\n"
+            "    pass\n",
+            encoding='utf-8'
+        )
+        monkeypatch.setenv(registry.PLUGIN_PATH_ENV, str(plugins))
+        yield plugins
+        for module_name in [name for name in sys.modules if name.startswith('economic_reporter_plugin_')]:
+            del sys.modules[module_name]
+
+    def test_plugin_imported_only_when_selected(self, plugin_dir):
+        """Тест ленивой загрузки плагина"""
+        assert 'inhouse-gdp' in registry.available_reports()
+        assert 'economic_reporter_plugin_inhouse' not in sys.modules
+
+        processor = registry.get_processor('inhouse-gdp')
+
+        assert type(processor).__name__ == 'InhouseGDPProcessor'
+        assert type(processor).__module__.startswith('economic_reporter_plugin_inhouse_')
+        assert type(processor).__module__ in sys.modules
+
+    def test_plugins_with_same_file_name(self, plugin_dir, tmp_path, monkeypatch):
+        """Тест одноименных файлов плагинов из разных каталогов"""
+        other_dir = tmp_path / "other_plugins"
+        other_dir.mkdir()
+        (other_dir / "inhouse.py").write_text(
+            "from economic_reporter.processors import AverageUnemploymentProcessor\n"
+            "\n"
+            "REPORTS = {'inhouse-unemployment': 'InhouseUnemploymentProcessor'}\n"
+            "\n"
+            "\n"
+            "class InhouseUnemploymentProcessor(AverageUnemploymentProcessor):\n"
+            "    pass\n",
+            encoding='utf-8'
+        )
+        monkeypatch.setenv(registry.PLUGIN_PATH_ENV, os.pathsep.join([str(plugin_dir), str(other_dir)]))
+
+        gdp_processor = registry.get_processor('inhouse-gdp')
+        unemployment_processor = registry.get_processor('inhouse-unemployment')
+
+        assert type(gdp_processor).__name__ == 'InhouseGDPProcessor'
+        assert type(unemployment_processor).__name__ == 'InhouseUnemploymentProcessor'
+
+    def test_dangling_symlink_in_plugin_dir(self, plugin_dir, capsys):
+        """Тест битой символической ссылки в каталоге плагинов"""
+        try:
+            (plugin_dir / "broken.py").symlink_to(plugin_dir / "missing.py")
+        except (OSError, NotImplementedError):
+            pytest.skip("Символические ссылки недоступны")
+
+        assert 'inhouse-gdp' in registry.available_reports()
+        assert 'broken.py' in capsys.readouterr().err
+
+    def test_plugin_index_cached(self, plugin_dir, monkeypatch):
+        """Тест повторного использования индекса плагинов"""
+        registry.available_reports()
+
+        def fail_scan():
+            raise AssertionError("Индекс должен браться из кеша")
+
+        monkeypatch.setattr(registry, '_scan_plugin_dirs', fail_scan)
+        assert 'inhouse-gdp' in registry.available_reports()
+
+    def test_plugin_index_written_atomically(self, plugin_dir, monkeypatch):
+        """Тест атомарной записи индекса плагинов: при ошибке старый индекс цел, временный файл удален"""
+        registry.available_reports()
+        index_path = os.path.join(registry.default_cache_dir(), 'plugins.json')
+        with open(index_path, 'r', encoding='utf-8') as file:
+            index = file.read()
+        (plugin_dir / "extra.py").write_text("REPORTS = {}\n", encoding='utf-8')
+
+        def fail_replace(src, dst):
+            raise OSError("Диск переполнен")
+
+        with monkeypatch.context() as m:
+            m.setattr(os, 'replace', fail_replace)
+            assert 'inhouse-gdp' in registry.available_reports()
+
+        with open(index_path, 'r', encoding='utf-8') as file:
+            assert file.read() == index
+        assert os.listdir(registry.default_cache_dir()) == ['plugins.json']
+
+    def test_plugin_with_own_process(self, plugin_dir, tmp_path):
+        """Тест плагина, который, как раньше, реализует только process"""
+        (plugin_dir / "legacy.py").write_text(
+            "from economic_reporter.processors import ReportProcessor\n"
+            "\n"
+            "REPORTS = {'legacy-count': 'CountProcessor'}\n"
+            "\n"
+            "\n"
+            "class CountProcessor(ReportProcessor):\n"
+            "    @property\n"
+            "    def required_columns(self):\n"
+            "        return ['country']\n"
+            "\n"
+            "    def process(self, data):\n"
+            "        grouped = self.reader.group_by_column(data, 'country')\n"
+            "        return [(country, float(len(rows))) for country, rows in grouped.items()]\n",
+            encoding='utf-8'
+        )
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("country,gdp\nUSA,1\nUSA,2\nChina,3\n", encoding='utf-8')
+
+        processor = registry.get_processor('legacy-count', memory_limit=1024 ** 2)
+
+        assert processor.execute([str(csv_file)]) == [('USA', 2.0), ('China', 1.0)]
+        assert processor.execute_sections([str(csv_file)]) == {None: [('USA', 2.0), ('China', 1.0)]}
+
+    def test_parse_args_plugin_report(self, plugin_dir):
+        """Тест выбора отчета из плагина в командной строке"""
+        result = parse_args(['--files', 'data.csv', '--report', 'inhouse-gdp'])
+        assert result.report == 'inhouse-gdp'
+
+
+class TestResultCache:
+    """Тесты для ResultCache"""
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """Fixture с входным CSV файлом"""
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("country,gdp\nUSA,25000\n", encoding='utf-8')
+        return csv_file
+
+    def test_hit_and_miss(self, tmp_path, csv_file):
+        """Тест попадания и промаха с подсчетом статистики"""
+        cache = ResultCache(str(tmp_path / "cache"))
+        key = cache.make_key({'report': 'average-gdp'}, [str(csv_file)])
+
+        assert cache.get(key) is None
+        cache.put(key, {None: [('USA', 25000.0)]}, {'duplicates_dropped': 0})
+
+        assert cache.get(key) == ({None: [('USA', 25000.0)]}, {'duplicates_dropped': 0})
+        assert cache.stats() == {'hits': 1, 'misses': 1}
+
+    def test_key_depends_on_file_and_params(self, tmp_path, csv_file):
+        """Тест изменения ключа при изменении файла или параметров"""
+        cache = ResultCache(str(tmp_path / "cache"), hash_contents=True)
+        key = cache.make_key({'report': 'average-gdp'}, [str(csv_file)])
+
+        assert cache.make_key({'report': 'average-unemployment'}, [str(csv_file)]) != key
+        csv_file.write_text("country,gdp\nUSA,26000\n", encoding='utf-8')
+        assert cache.make_key({'report': 'average-gdp'}, [str(csv_file)]) != key
+        assert cache.make_key({'report': 'average-gdp'}, [str(tmp_path / "missing.csv")]) is None
+
+    def test_ttl_expired(self, tmp_path, csv_file):
+        """Тест устаревания записи по TTL"""
+        cache = ResultCache(str(tmp_path / "cache"), ttl=0)
+        key = cache.make_key({}, [str(csv_file)])
+        cache.put(key, {None: [('USA', 25000.0)]})
+
+        assert cache.get(key) is None
+
+    def test_lru_eviction(self, tmp_path, csv_file):
+        """Тест вытеснения давно не использованных записей"""
+        cache = ResultCache(str(tmp_path / "cache"), max_entries=2)
+        keys = [cache.make_key({'limit': limit}, [str(csv_file)]) for limit in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, {None: [('USA', float(i))]})
+            # Разводим время изменения записей, чтобы порядок LRU был однозначным
+            os.utime(cache._entry_path(key), (i, i))
+
+        cache.put(keys[2], {None: [('USA', 2.0)]})
+
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[2]) is not None
+
+    def test_stats_concurrent_processes(self, tmp_path, csv_file):
+        """Тест статистики при одновременных обращениях из нескольких процессов"""
+        import multiprocessing
+        cache = ResultCache(str(tmp_path / "cache"))
+        key = cache.make_key({}, [str(csv_file)])
+
+        with multiprocessing.Pool(4) as pool:
+            pool.starmap(_lookup_many, [(cache.directory, key, 50)] * 4)
+
+        assert cache.stats() == {'hits': 0, 'misses': 200}
+
+    def test_stats_log_compacted(self, tmp_path, csv_file, monkeypatch):
+        """Тест сворачивания файла статистики: размер ограничен, счетчики не теряются"""
+        from economic_reporter import cache as cache_module
+        monkeypatch.setattr(cache_module, 'STATS_LOG_LIMIT', 10)
+        cache = ResultCache(str(tmp_path / "cache"))
+        key = cache.make_key({}, [str(csv_file)])
+
+        for _ in range(20):
+            cache.get(key)
+        # Каждая запись вытесняет старые и сворачивает статистику
+        for _ in range(5):
+            cache.put(key, {None: [('USA', 25000.0)]})
+            for _ in range(20):
+                cache.get(key)
+        cache.put(key, {None: [('USA', 25000.0)]})
+
+        stats_log = tmp_path / "cache" / cache_module.STATS_FILE
+        assert not stats_log.exists() or stats_log.stat().st_size < 10
+        assert cache.stats() == {'hits': 100, 'misses': 20}
+        assert not (tmp_path / "cache" / "stats.lock").exists()
+
+
+def _lookup_many(directory, key, count):
+    """Многократно обращается к кешу (выполняется в дочернем процессе)"""
+    cache = ResultCache(directory)
+    for _ in range(count):
+        cache.get(key)
+
+
 class TestTableFormatter:
     """Тесты для форматирования таблиц"""
 
@@ -291,6 +939,48 @@ class TestCLI:
 
         assert result.limit == 5
 
+    def test_parse_args_with_memory_limit(self):
+        """Тест аргумента лимита памяти"""
+        args = ['--files', 'data.csv', '--report', 'average-gdp', '--memory-limit', '256M']
+        result = parse_args(args)
+
+        assert result.memory_limit == 256 * 1024 ** 2
+
+    def test_parse_args_with_group_by(self):
+        """Тест аргумента уровней группировки"""
+        args = ['--files', 'data.csv', '--report', 'gdp-rollup', '--group-by', 'continent', 'year']
+        result = parse_args(args)
+
+        assert result.group_by == ['continent', 'year']
+
+    def test_group_by_choices_match_rollup_levels(self):
+        """Тест: варианты --group-by совпадают с уровнями rollup-процессора"""
+        args = ['--files', 'data.csv', '--report', 'gdp-rollup', '--group-by', *RollupProcessor.LEVELS]
+        result = parse_args(args)
+
+        assert result.group_by == list(RollupProcessor.LEVELS)
+
+    def test_parse_args_with_dedupe(self):
+        """Тест аргументов удаления дубликатов"""
+        args = ['--files', 'a.csv', 'b.csv', '--report', 'average-gdp', '--dedupe', 'last', '--prefer', 'b.csv']
+        result = parse_args(args)
+
+        assert result.dedupe == 'last'
+        assert result.prefer == ['b.csv']
+
+    def test_parse_args_with_prefetch(self):
+        """Тест аргументов упреждающего чтения"""
+        args = ['--files', 'data.csv', '--report', 'average-gdp', '--prefetch', '4', '--prefetch-memory', '128M']
+        result = parse_args(args)
+
+        assert result.prefetch == 4
+        assert result.prefetch_memory == 128 * 1024 ** 2
+
+    def test_parse_size_invalid(self):
+        """Тест некорректного размера"""
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_size('много')
+
     def test_parse_args_missing_required(self):
         """Тест отсутствия обязательных аргументов"""
         with pytest.raises(SystemExit):
@@ -326,6 +1016,94 @@ class TestMain:
         from economic_reporter.main import main
         main()  # Не должно быть исключений
 
+    def test_main_uses_result_cache(self, monkeypatch, tmp_path, capsys):
+        """Тест повторного запуска main с ответом из кеша без чтения файлов"""
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("country,gdp\nUSA,25000\nChina,18000\n", encoding='utf-8')
+        monkeypatch.setattr('sys.argv', [
+            'main.py', '--files', str(csv_file), '--report', 'average-gdp', '--cache'
+        ])
+
+        from economic_reporter.main import main
+        main()
+        first_output = capsys.readouterr().out
+
+        def fail_execute(*_, **__):
+            raise AssertionError("При попадании в кеш файлы не должны читаться")
+
+        monkeypatch.setattr(AverageGDPProcessor, 'iter_sections', fail_execute)
+        main()
+
+        assert capsys.readouterr().out == first_output
+
+    def test_cache_params_include_backend_memory_limit_and_modules(self, tmp_path, monkeypatch):
+        """Тест ключа кеша: бэкенд, лимит памяти и версии модулей пакета и плагина меняют параметры"""
+        from economic_reporter import aggregator
+        from economic_reporter.main import cache_params
+        plugins = tmp_path / "plugins"
+        plugins.mkdir()
+        plugin_file = plugins / "inhouse.py"
+        plugin_file.write_text(
+            "from economic_reporter.processors import AverageGDPProcessor\n"
+            "\n"
+            "REPORTS = {'inhouse-gdp': 'InhouseGDPProcessor'}\n"
+            "\n"
+            "\n"
+            "class InhouseGDPProcessor(AverageGDPProcessor):\n"
+            "    pass\n",
+            encoding='utf-8'
+        )
+        monkeypatch.setenv(registry.PLUGIN_PATH_ENV, str(plugins))
+        args = parse_args(['--files', 'data.csv', '--report', 'inhouse-gdp'])
+        try:
+            params = cache_params(args)
+
+            assert params['backend'] == AverageGDPProcessor.backend
+            # Модуль пакета учитывается, даже если его нет среди классов процессора
+            assert os.path.abspath(aggregator.__file__) in params['modules']
+            assert str(plugin_file) in params['modules']
+
+            with monkeypatch.context() as m:
+                m.setattr(AverageGDPProcessor, 'backend', 'other')
+                assert cache_params(args) != params
+
+            args.memory_limit = 1024 ** 2
+            assert cache_params(args) != params
+            args.memory_limit = None
+            assert cache_params(args) == params
+
+            stat = os.stat(plugin_file)
+            os.utime(plugin_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            assert cache_params(args) != params
+            os.utime(plugin_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+            # Правка модуля пакета: время изменения подменяется, сам файл не трогается
+            real_stat = os.stat
+            module_file = os.path.abspath(aggregator.__file__)
+
+            def touched_stat(path, *stat_args, **kwargs):
+                result = real_stat(path, *stat_args, **kwargs)
+                if path == module_file:
+                    values = list(result)
+                    return type(result)(values, {'st_mtime_ns': result.st_mtime_ns + 1})
+                return result
+
+            with monkeypatch.context() as m:
+                m.setattr(os, 'stat', touched_stat)
+                assert cache_params(args) != params
+        finally:
+            for module_name in [name for name in sys.modules if name.startswith('economic_reporter_plugin_')]:
+                del sys.modules[module_name]
+
+    @pytest.mark.parametrize('reverse', [True, False])
+    def test_select_data_matches_full_sort(self, reverse):
+        """Тест отбора первых N записей: тот же результат, что у полной сортировки"""
+        from economic_reporter.main import select_data, sort_data
+        data = [(f'Country{i}', float(i % 7)) for i in range(100)]
+
+        assert select_data(iter(data), reverse, limit=10) == sort_data(data, reverse)[:10]
+        assert select_data(iter(data), reverse) == sort_data(data, reverse)
+
     def test_main_no_data(self, monkeypatch):
         """Тест main с отсутствием данных"""
         test_args = [